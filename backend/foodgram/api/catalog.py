@@ -0,0 +1,143 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import IngredientSerializer, TagSerializer
+from common.cache import build_cache_key
+from recipes.models import Ingredient, Tag
+
+
+class CatalogSnapshot(NamedTuple):
+    """Catalog records rendered to JSON at some version of the table."""
+
+    version: tuple
+    etag: str
+    last_modified: int
+    records: tuple
+    list_content: bytes
+    detail_content: MappingProxyType
+
+
+class Catalog:
+    """
+    Keep in-process snapshot of a rarely changed table rendered to JSON.
+
+    The snapshot is built once per worker. At most once per
+    CATALOG_CHECK_INTERVAL seconds the table version (number of records
+    and the latest modified time) is fetched from db and the snapshot is
+    rebuilt if the version has changed, so changes made in one worker
+    reach the others and most requests are answered without any query.
+    """
+
+    def __init__(self, queryset, serializer_class):
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self._snapshot = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get_version(self):
+        summary = self.queryset.order_by().aggregate(
+            last_modified=Max('modified'), total=Count('pk')
+        )
+        return summary['total'], summary['last_modified']
+
+    def build_snapshot(self, version):
+        renderer = JSONRenderer()
+        data = self.serializer_class(self.queryset.all(), many=True).data
+        total, last_modified = version
+        last_modified = int(last_modified.timestamp()) if total else 0
+        return CatalogSnapshot(
+            version=version,
+            etag=quote_etag(
+                build_cache_key(
+                    'catalog', self.queryset.model._meta.label, *version
+                )
+            ),
+            last_modified=last_modified,
+            records=tuple(data),
+            list_content=renderer.render(data),
+            detail_content=MappingProxyType(
+                {str(record['id']): renderer.render(record) for record in data}
+            ),
+        )
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        interval = settings.CATALOG_CHECK_INTERVAL
+        if snapshot is not None and (
+            time.monotonic() - self._checked_at < interval
+        ):
+            return snapshot
+        with self._lock:
+            if self._snapshot is snapshot:
+                version = self.get_version()
+                if snapshot is None or snapshot.version != version:
+                    self._snapshot = self.build_snapshot(version)
+                self._checked_at = time.monotonic()
+        return self._snapshot
+
+
+TAG_CATALOG = Catalog(Tag.objects.all(), TagSerializer)
+INGREDIENT_CATALOG = Catalog(Ingredient.objects.all(), IngredientSerializer)
+
+
+class CatalogMixin:
+    """
+    Serve list and retrieve actions from in-process catalog snapshot.
+
+    Only JSON requests without query parameters are served from the
+    snapshot, others are handled as usual.
+    """
+
+    catalog = None
+
+    def get_catalog(self) -> Catalog:
+        return self.catalog
+
+    def is_catalog_request(self, request):
+        return (
+            not request.query_params
+            and request.accepted_renderer.format == 'json'
+        )
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        if not self.is_catalog_request(request):
+            return super().list(request, *args, **kwargs)
+        snapshot = self.get_catalog().get_snapshot()
+        return self.get_catalog_response(
+            request, snapshot, snapshot.list_content
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.is_catalog_request(request):
+            return super().retrieve(request, *args, **kwargs)
+        snapshot = self.get_catalog().get_snapshot()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        content = snapshot.detail_content.get(self.kwargs[lookup_url_kwarg])
+        if content is None:
+            raise Http404
+        return self.get_catalog_response(request, snapshot, content)
+
+    def get_catalog_response(self, request, snapshot, content):
+        response = get_conditional_response(
+            request._request,
+            etag=snapshot.etag,
+            last_modified=snapshot.last_modified,
+        )
+        if response is None:
+            response = HttpResponse(
+                content, content_type=request.accepted_media_type
+            )
+        response['ETag'] = snapshot.etag
+        response['Last-Modified'] = http_date(snapshot.last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
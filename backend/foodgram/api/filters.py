@@ -1,13 +1,22 @@
-import operator
 from distutils.util import strtobool
-from functools import reduce
-from itertools import chain
 
 import django_filters
 from django.db import models
+from django.db.models import Exists, OuterRef
 from rest_framework import filters
 
-from recipes.models import Recipe, Tag
+from api.catalog import TAG_CATALOG
+from api.search import AutocompleteIndex
+from common.membership import get_recipe_ids
+from common.search import search_recipes
+from recipes.models import FavoriteRecipe, InCartRecipe, Recipe, TagRecipe
+
+
+def tag_choices():
+    return [
+        (record['slug'], record['name'])
+        for record in TAG_CATALOG.get_snapshot().records
+    ]
 
 
 class RecipeFilter(django_filters.FilterSet):
@@ -17,16 +26,17 @@ class RecipeFilter(django_filters.FilterSet):
     )
 
     is_favorited = django_filters.TypedChoiceFilter(
-        choices=BOOLEAN_CHOICES, coerce=strtobool
+        choices=BOOLEAN_CHOICES, coerce=strtobool, method='filter_is_favorited'
     )
     is_in_shopping_cart = django_filters.TypedChoiceFilter(
-        choices=BOOLEAN_CHOICES, coerce=strtobool
+        choices=BOOLEAN_CHOICES,
+        coerce=strtobool,
+        method='filter_is_in_shopping_cart',
     )
     author = django_filters.NumberFilter(field_name='author__id')
-    tags = django_filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
+    search = django_filters.CharFilter(method='filter_search')
+    tags = django_filters.MultipleChoiceFilter(
+        choices=tag_choices, method='filter_tags'
     )
 
     class Meta:
@@ -36,8 +46,48 @@ class RecipeFilter(django_filters.FilterSet):
             'is_in_shopping_cart',
             'author',
             'tags',
+            'search',
         )
 
+    def filter_by_membership(self, queryset, value, through_model):
+        recipe_ids = get_recipe_ids(self.request.user, through_model)
+        if value:
+            return queryset.filter(id__in=recipe_ids)
+        return queryset.exclude(id__in=recipe_ids)
+
+    def filter_tags(self, queryset, name, value):
+        """
+        Filter recipes having any of the tags.
+
+        Slugs are resolved to ids with the tag catalog snapshot and recipes
+        are filtered with a single EXISTS subquery, so there are neither
+        joins producing duplicates nor DISTINCT. Slugs are validated by an
+        earlier snapshot, tags deleted since then are skipped.
+        """
+        tag_ids = {
+            record['slug']: record['id']
+            for record in TAG_CATALOG.get_snapshot().records
+        }
+        return queryset.filter(
+            Exists(
+                TagRecipe.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag_id__in=[
+                        tag_ids[slug] for slug in value if slug in tag_ids
+                    ],
+                )
+            )
+        )
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_by_membership(queryset, value, FavoriteRecipe)
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_by_membership(queryset, value, InCartRecipe)
+
 
 class IngredientSearchFilter(filters.SearchFilter):
     """Search ingredients by name via name query parameter.
@@ -46,9 +96,32 @@ class IngredientSearchFilter(filters.SearchFilter):
     are listed in search order:
      - ingredients that start with terms are listed first
      - than ingredients that contain terms are listed
+    Number of results can be limited via limit query parameter.
+
+    Search runs over in-memory autocomplete index built from the view
+    catalog snapshot and rebuilt when the snapshot changes, the queryset
+    is then filtered by ids of found ingredients.
     """
 
     search_param = 'name'
+    limit_param = 'limit'
+
+    _indexes = {}
+
+    def get_index(self, view):
+        snapshot = view.get_catalog().get_snapshot()
+        version, index = self._indexes.get(view.__class__, (None, None))
+        if version != snapshot.version:
+            index = AutocompleteIndex(snapshot.records)
+            self._indexes[view.__class__] = (snapshot.version, index)
+        return index
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_param])
+        except (KeyError, ValueError):
+            return None
+        return limit if limit > 0 else None
 
     def filter_queryset(self, request, queryset, view):
         search_terms = self.get_search_terms(request)
@@ -56,23 +129,16 @@ class IngredientSearchFilter(filters.SearchFilter):
         if not search_terms:
             return queryset
 
-        istartswith_conditions = []
-        icontains_conditions = []
-        for search_term in search_terms:
-            istartswith_conditions.append(
-                models.Q(name__istartswith=search_term)
-            )
-            icontains_conditions.append(models.Q(name__icontains=search_term))
-
-        istartswith_queryset = queryset.filter(
-            reduce(operator.or_, istartswith_conditions)
+        prefix_ids, substring_ids = self.get_index(view).search(
+            search_terms, self.get_limit(request)
         )
-
-        icontains_queryset = queryset.filter(
-            reduce(operator.or_, icontains_conditions)
+        rank = models.Case(
+            models.When(pk__in=prefix_ids, then=0),
+            default=1,
+            output_field=models.IntegerField(),
         )
-
-        return chain(
-            istartswith_queryset,
-            icontains_queryset.difference(istartswith_queryset),
+        return (
+            queryset.filter(pk__in=prefix_ids + substring_ids)
+            .annotate(search_rank=rank)
+            .order_by('search_rank', 'name')
         )
@@ -1,4 +1,29 @@
-from rest_framework import mixins, viewsets
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Count, Max, QuerySet
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+
+from common.cache import build_cache_key, get_content_version, get_or_refresh
+
+
+def normalize_query(request):
+    """Return query string with parameters and their values sorted."""
+    return urlencode(
+        sorted(
+            (param, value)
+            for param, values in request.query_params.lists()
+            for value in values
+        )
+    )
 
 
 class CreateDestroyViewSet(
@@ -11,3 +36,157 @@ class CreateDestroyViewSet(
     """
 
     pass
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Cache list and retrieve responses for anonymous users.
+
+    Anonymous users get the same response for the same query, so the
+    response data is cached by host, path and normalized query string.
+    The data is cached with the content version which is bumped whenever
+    recipes or related records change. Data of an older version is served
+    stale while one of the requests refreshes it, such responses have the
+    stale attribute set.
+    """
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+
+        uncached = []
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                uncached.append(response)
+                return None
+            return response.data
+
+        key = build_cache_key(
+            'response',
+            request.get_host(),
+            request.path,
+            normalize_query(request),
+        )
+        data, stale = get_or_refresh(
+            key,
+            compute,
+            settings.RESPONSE_CACHE_TIMEOUT,
+            settings.RESPONSE_CACHE_STALE_TIMEOUT,
+            version=get_content_version(),
+        )
+        if data is None:
+            return uncached[0]
+        response = Response(data)
+        response.stale = stale
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GET requests to list and retrieve actions.
+
+    Anonymous users get the same response for the same query until the
+    content version changes, so their validators are computed from the
+    version and the query string without queries. For authenticated users
+    the latest modified time and the number of records in the filtered
+    queryset and the user specific validators are added. If the client
+    already has the current representation, 304 response is returned
+    before the records are fetched and serialized. Stale cached responses
+    get no validators, since they belong to an older representation.
+
+    Changes of user specific validators have no time, so responses with
+    them have no Last-Modified and are only revalidated by ETag.
+    """
+
+    def list(self, request, *args, **kwargs):  # noqa: A003
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validators_queryset(self):
+        queryset = self.get_queryset()
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            return queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        filtered_queryset = self.filter_queryset(queryset)
+        if isinstance(filtered_queryset, QuerySet):
+            return filtered_queryset
+        # filter backend returned records which can't be aggregated,
+        # the query string in ETag distinguishes filtered results then
+        return queryset
+
+    def get_user_validators(self):
+        """Return values that make response differ for the current user."""
+        return ()
+
+    def get_validators(self, request):
+        """
+        Return (etag, last_modified) of the requested records, last_modified
+        is None if the response depends on the current user.
+        """
+        version = get_content_version()
+        last_modified = datetime.fromtimestamp(version / 1e9, timezone.utc)
+        query = normalize_query(request)
+        if request.user.is_anonymous:
+            etag = build_cache_key('etag', version, request.path, query)
+            return etag, int(last_modified.timestamp())
+
+        summary = (
+            self.get_validators_queryset()
+            .order_by()
+            .aggregate(last_modified=Max('modified'), total=Count('pk'))
+        )
+        if summary['last_modified']:
+            last_modified = max(last_modified, summary['last_modified'])
+        user_validators = self.get_user_validators()
+        etag = build_cache_key(
+            'etag',
+            version,
+            last_modified.isoformat(),
+            summary['total'],
+            request.path,
+            query,
+            *user_validators,
+        )
+        if user_validators:
+            return etag, None
+        return etag, int(last_modified.timestamp())
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        etag = quote_etag(etag)
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        response = not_modified or handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ) and not getattr(response, 'stale', False):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        if not request.user.is_anonymous:
+            patch_cache_control(response, private=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
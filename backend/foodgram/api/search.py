@@ -0,0 +1,72 @@
+from bisect import bisect_left, bisect_right
+
+
+def fold(text: str) -> str:
+    """Normalize text for case-insensitive search, ё is treated as е."""
+    return text.casefold().replace('ё', 'е')
+
+
+class AutocompleteIndex:
+    """
+    In-memory index for prefix and substring search over names.
+
+    Names are case folded and sorted, so records which names start with
+    a term form a contiguous range found with binary search. Substring
+    search runs str.find over all names joined into a single string.
+    Both kinds of results are returned in name order.
+    """
+
+    separator = '\n'
+
+    def __init__(self, records, field='name'):
+        entries = sorted(
+            (fold(record[field]), record['id']) for record in records
+        )
+        self.names = [name for name, _ in entries]
+        self.ids = [pk for _, pk in entries]
+        self.offsets = []
+        offset = 0
+        for name in self.names:
+            self.offsets.append(offset)
+            offset += len(name) + len(self.separator)
+        self.text = self.separator.join(self.names)
+
+    def _prefix_positions(self, term):
+        start = bisect_left(self.names, term)
+        end = bisect_right(self.names, term + '\U0010ffff', lo=start)
+        return range(start, end)
+
+    def _substring_positions(self, term):
+        positions = []
+        found = self.text.find(term)
+        while found != -1:
+            position = bisect_right(self.offsets, found) - 1
+            positions.append(position)
+            if position + 1 == len(self.offsets):
+                break
+            found = self.text.find(term, self.offsets[position + 1])
+        return positions
+
+    def search(self, terms, limit=None):
+        """
+        Return (prefix_ids, substring_ids) of records matching any term.
+
+        prefix_ids are ids of records which names start with a term,
+        substring_ids are ids of other records which names contain a term.
+        Both lists together have at most limit ids.
+        """
+        terms = [fold(term) for term in terms if term]
+        prefix = set()
+        for term in terms:
+            prefix.update(self._prefix_positions(term))
+        substring = set()
+        for term in terms:
+            substring.update(self._substring_positions(term))
+        substring -= prefix
+
+        prefix_ids = [self.ids[position] for position in sorted(prefix)]
+        substring_ids = [self.ids[position] for position in sorted(substring)]
+        if limit is not None:
+            prefix_ids = prefix_ids[:limit]
+            substring_ids = substring_ids[: max(limit - len(prefix_ids), 0)]
+        return prefix_ids, substring_ids
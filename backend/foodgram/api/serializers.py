@@ -1,9 +1,21 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.utils.translation import gettext_lazy as _
 from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
 from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
 
+from common.serializers import ImageVariantsField
+from common.signals import send_recipes_created
+from common.uploads import MAX_SIZE_MESSAGE
 from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
 from users.serializers import CustomUserSerializer
 
@@ -44,6 +56,11 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
         model = IngredientRecipe
         fields = ('id', 'amount')
 
+    def to_representation(self, instance):
+        # ingredient_id is used instead of ingredient.id to not load
+        # ingredient of every row
+        return {'id': instance.ingredient_id, 'amount': instance.amount}
+
     def validate_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError(
@@ -58,6 +75,7 @@ class ReadOnlyRecipeSerializer(serializers.ModelSerializer):
         many=True, read_only=True, source='ingredient_recipes'
     )
     tags = TagSerializer(many=True, read_only=True)
+    images = ImageVariantsField(source='image')
 
     is_favorited = serializers.BooleanField()
     is_in_shopping_cart = serializers.BooleanField()
@@ -71,6 +89,7 @@ class ReadOnlyRecipeSerializer(serializers.ModelSerializer):
             'is_favorited',
             'is_in_shopping_cart',
             'image',
+            'images',
             'cooking_time',
             'author',
             'tags',
@@ -78,14 +97,201 @@ class ReadOnlyRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class TagPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key of a tag, looked up in tags preloaded into tag_lookup of
+    serializer context if they are there.
+    """
+
+    def to_internal_value(self, data):
+        tags = self.context.get('tag_lookup')
+        if tags is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in tags:
+            self.fail('does_not_exist', pk_value=data)
+        return tags[pk]
+
+
+class CheckedImageField(serializers.ImageField):
+    """
+    Image file with size, format and dimensions checked before the image
+    is decoded. Only the image header is read for the checks.
+    """
+
+    default_error_messages = {
+        'max_size': MAX_SIZE_MESSAGE,
+        'invalid_format': _(
+            'Upload a valid image in JPEG, PNG or GIF format.'
+        ),
+        'max_dimension': _(
+            'Ensure the image width and height are at most '
+            '{max_dimension} pixels.'
+        ),
+    }
+    ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF')
+
+    def to_internal_value(self, data):
+        if getattr(data, 'size', 0) > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.fail('max_size', max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+        try:
+            with Image.open(data) as image:
+                image_format = image.format
+                width, height = image.size
+        except Exception:
+            self.fail('invalid_format')
+        if image_format not in self.ALLOWED_FORMATS:
+            self.fail('invalid_format')
+        if max(width, height) > settings.RECIPE_IMAGE_MAX_DIMENSION:
+            self.fail(
+                'max_dimension',
+                max_dimension=settings.RECIPE_IMAGE_MAX_DIMENSION,
+            )
+        data.seek(0)
+        return super().to_internal_value(data)
+
+
+class RecipeImageField(Base64ImageField, CheckedImageField):
+    """
+    Image uploaded as a file of multipart request or as base64 encoded
+    string. Size of base64 encoded image is checked before it's decoded.
+    Uploaded files are renamed like decoded ones.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            file = CheckedImageField.to_internal_value(self, data)
+            extension = file.image.format.lower()
+            file.name = f'{self.get_file_name(file)}.{extension}'
+            return file
+        if isinstance(data, str):
+            encoded = data.partition(';base64,')[2] or data
+            if len(encoded) * 3 // 4 > settings.RECIPE_IMAGE_MAX_SIZE:
+                self.fail(
+                    'max_size', max_size=settings.RECIPE_IMAGE_MAX_SIZE
+                )
+        return super().to_internal_value(data)
+
+
+def create_recipes(items):
+    """
+    Insert recipes from validated data of RecipeSerializer together with
+    their tags and ingredients, in batches of RECIPE_BULK_CREATE_BATCH_SIZE.
+
+    Bulk inserts don't send post_save, so recipes_created is sent for the
+    inserted recipes. Its receivers keep counters, feeds, search vectors,
+    image variants and the content version in sync, the same as for
+    recipes created by save(). Must be called within a transaction.
+    """
+    batch_size = settings.RECIPE_BULK_CREATE_BATCH_SIZE
+    tags = [item.pop('tags') for item in items]
+    ingredient_recipes = [item.pop('ingredient_recipes') for item in items]
+    recipes = Recipe.objects.bulk_create(
+        [Recipe(**item) for item in items], batch_size=batch_size
+    )
+    TagRecipe.objects.bulk_create(
+        [
+            TagRecipe(tag=tag, recipe=recipe)
+            for recipe, recipe_tags in zip(recipes, tags)
+            for tag in dict.fromkeys(recipe_tags)
+        ],
+        batch_size=batch_size,
+    )
+    IngredientRecipe.objects.bulk_create(
+        [
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient=entry['ingredient'],
+                amount=entry['amount'],
+            )
+            for recipe, entries in zip(recipes, ingredient_recipes)
+            for entry in entries
+        ],
+        batch_size=batch_size,
+    )
+    send_recipes_created(recipes)
+    return recipes
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """
+    Create many recipes at once.
+
+    Tags and ingredients of all recipes are looked up with one query each
+    before validation. Recipes are inserted by create_recipes within a
+    single transaction.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            limit = settings.RECIPE_BULK_CREATE_MAX_ITEMS
+            if len(data) > limit:
+                message = _('Ensure there are no more than %(limit)s recipes.')
+                raise serializers.ValidationError(
+                    {
+                        api_settings.NON_FIELD_ERRORS_KEY: [
+                            message % {'limit': limit}
+                        ]
+                    }
+                )
+            self.preload(data)
+        return super().to_internal_value(data)
+
+    def preload(self, data):
+        ingredient_ids = set()
+        for item in data:
+            entries = item.get('ingredients') if isinstance(item, dict) else ()
+            if not isinstance(entries, list):
+                continue
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    continue
+                try:
+                    ingredient_ids.add(int(entry.get('id')))
+                except (TypeError, ValueError):
+                    pass
+        self.context['tag_lookup'] = Tag.objects.in_bulk()
+        self.context['ingredient_lookup'] = Ingredient.objects.in_bulk(
+            ingredient_ids
+        )
+
+    def validate(self, attrs):
+        author = self.context['request'].user
+        names = [item['name'] for item in attrs]
+        duplicates = {name for name in names if names.count(name) > 1}
+        duplicates.update(
+            Recipe.objects.filter(author=author, name__in=names).values_list(
+                'name', flat=True
+            )
+        )
+        if duplicates:
+            raise serializers.ValidationError(
+                [
+                    _('Recipe with name %(name)s already exists.')
+                    % {'name': name}
+                    for name in sorted(duplicates)
+                ]
+            )
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        recipes = create_recipes(validated_data)
+        prefetch_related_objects(recipes, 'tags', 'ingredient_recipes')
+        return recipes
+
+
 class RecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = RecipeImageField()
     ingredients = IngredientAmountSerializer(
         many=True, source='ingredient_recipes'
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = TagPrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
 
     class Meta:
         model = Recipe
@@ -100,6 +306,38 @@ class RecipeSerializer(serializers.ModelSerializer):
             'ingredients',
         )
         read_only_fields = ('author',)
+        list_serializer_class = RecipeListSerializer
+
+    def to_internal_value(self, data):
+        if html.is_html_input(data):
+            data = self.parse_form_data(data)
+        return super().to_internal_value(data)
+
+    def parse_form_data(self, data):
+        """
+        Return multipart form data as a dict.
+
+        Tags and ingredients are given either as form fields, e.g. tags=1,
+        tags=2, ingredients[0]id=1 and ingredients[0]amount=10, or as JSON
+        encoded lists in tags and ingredients fields.
+        """
+        parsed = {key: data[key] for key in data}
+        for field_name in ('tags', 'ingredients'):
+            values = data.getlist(field_name)
+            if len(values) == 1:
+                try:
+                    value = json.loads(values[0])
+                except ValueError:
+                    value = None
+                if isinstance(value, list):
+                    parsed[field_name] = value
+                    continue
+            value = self.fields[field_name].get_value(data)
+            if value is empty:
+                parsed.pop(field_name, None)
+            else:
+                parsed[field_name] = value
+        return parsed
 
     def validate_ingredients(self, value):
         errors = []
@@ -116,9 +354,20 @@ class RecipeSerializer(serializers.ModelSerializer):
                 )
             ingredient_ids.add(ingredient_id)
 
+        ingredients = self.context.get('ingredient_lookup')
+        if ingredients is None:
+            ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        for ingredient_id in sorted(ingredient_ids - ingredients.keys()):
+            errors.append(
+                _('Ingredient with id %(ingredient_id)s does not exist')
+                % {'ingredient_id': ingredient_id}
+            )
+
         if errors:
             raise serializers.ValidationError([{'errors': errors}])
 
+        for entry in value:
+            entry['ingredient'] = ingredients[entry['ingredient']['id']]
         return value
 
     def validate_cooking_time(self, value):
@@ -128,45 +377,50 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def create_ingredient_recipe(self, ingredient_recipe, recipe):
-        amount = ingredient_recipe['amount']
-        current_ingredient = Ingredient.objects.get(
-            pk=ingredient_recipe['ingredient']['id']
-        )
-        IngredientRecipe.objects.create(
-            ingredient=current_ingredient,
-            recipe=recipe,
-            amount=amount,
-        )
-
     @transaction.atomic
     def create(self, validated_data):
-        tags = validated_data.pop('tags')
-        ingredient_recipes = validated_data.pop('ingredient_recipes')
-        recipe = Recipe.objects.create(**validated_data)
-        for tag in tags:
-            current_tag = Tag.objects.get(pk=tag.id)
-            TagRecipe.objects.create(tag=current_tag, recipe=recipe)
-        for ingredient_recipe_data in ingredient_recipes:
-            self.create_ingredient_recipe(ingredient_recipe_data, recipe)
-
-        return recipe
+        return create_recipes([validated_data])[0]
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        ingredient_recipes_data = None
-        if 'ingredient_recipes' in validated_data:
-            ingredient_recipes_data = validated_data.pop('ingredient_recipes')
-
+        ingredient_recipes = validated_data.pop('ingredient_recipes', None)
         instance = super().update(instance, validated_data)
-
-        IngredientRecipe.objects.filter(recipe=instance.id).delete()
-        if ingredient_recipes_data:
-            lst = []
-            for ingredient_recipe_data in ingredient_recipes_data:
-                self.create_ingredient_recipe(ingredient_recipe_data, instance)
-                lst.append(ingredient_recipe_data['ingredient']['id'])
-            instance.ingredients.set(lst)
-
-            instance.save()
+        if ingredient_recipes is not None:
+            self.update_ingredient_recipes(instance, ingredient_recipes)
         return instance
+
+    def update_ingredient_recipes(self, recipe, ingredient_recipes):
+        """
+        Bring ingredients of the recipe in line with ingredient_recipes,
+        touching only rows that are added, changed or removed.
+
+        Bulk operations don't send model signals. Search vector, content
+        version and shopping lists still follow the change, because the
+        recipe itself is saved in the same transaction.
+        """
+        existing = {
+            row.ingredient_id: row for row in recipe.ingredient_recipes.all()
+        }
+        created, updated = [], []
+        for entry in ingredient_recipes:
+            row = existing.pop(entry['ingredient'].pk, None)
+            if row is None:
+                created.append(
+                    IngredientRecipe(
+                        recipe=recipe,
+                        ingredient=entry['ingredient'],
+                        amount=entry['amount'],
+                    )
+                )
+            elif row.amount != entry['amount']:
+                row.amount = entry['amount']
+                updated.append(row)
+
+        if existing:
+            IngredientRecipe.objects.filter(
+                pk__in=[row.pk for row in existing.values()]
+            ).delete()
+        if updated:
+            IngredientRecipe.objects.bulk_update(updated, ['amount'])
+        if created:
+            IngredientRecipe.objects.bulk_create(created)
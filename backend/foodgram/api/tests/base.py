@@ -0,0 +1,117 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from recipes.models import (
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    Tag,
+    TagRecipe,
+)
+from users.models import Subscribe, User
+
+
+def make_image(size=(8, 8), image_format='PNG'):
+    """Return content of a generated image."""
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def make_base64_image(**kwargs):
+    encoded = base64.b64encode(make_image(**kwargs)).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+class TemporaryMediaMixin:
+    """Store files saved by tests in a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_root_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+
+
+# local memory cache keeps cache lookups out of the counted queries
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    },
+    FEED_FANOUT_WORKERS=0,
+    IMAGE_VARIANT_WORKERS=0,
+    PDF_RENDER_WORKERS=0,
+)
+class RecipesAPITestCase(APITestCase):
+    """Recipes of several authors with tags and ingredients."""
+
+    authors_count = 3
+    recipes_per_author = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='User',
+            last_name='User',
+            password='password',
+        )
+        cls.authors = [
+            User.objects.create_user(
+                email=f'author{number}@foodgram.ru',
+                username=f'author{number}',
+                first_name='Author',
+                last_name=str(number),
+                password='password',
+            )
+            for number in range(cls.authors_count)
+        ]
+        cls.tags = [
+            Tag.objects.create(
+                slug=slug, name=slug, color=f'#{number:06d}'
+            )
+            for number, slug in enumerate(('breakfast', 'lunch', 'dinner'))
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ingredient {number}', measurement_unit='g'
+            )
+            for number in range(4)
+        ]
+        for author in cls.authors:
+            for number in range(cls.recipes_per_author):
+                recipe = Recipe.objects.create(
+                    name=f'{author.username} recipe {number}',
+                    text='text',
+                    image=f'recipes/images/{author.username}-{number}.png',
+                    cooking_time=number + 1,
+                    author=author,
+                )
+                TagRecipe.objects.bulk_create(
+                    TagRecipe(recipe=recipe, tag=tag)
+                    for tag in cls.tags[: number % 3 + 1]
+                )
+                IngredientRecipe.objects.bulk_create(
+                    IngredientRecipe(
+                        recipe=recipe, ingredient=ingredient, amount=10
+                    )
+                    for ingredient in cls.ingredients
+                )
+        Subscribe.objects.create(user=cls.user, author=cls.authors[0])
+        cls.recipe = Recipe.objects.filter(author=cls.authors[1]).first()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
@@ -0,0 +1,110 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import (
+    RecipesAPITestCase,
+    TemporaryMediaMixin,
+    make_base64_image,
+)
+from common.cache import get_content_version
+from recipes.models import FeedEntry, Recipe
+
+
+class RecipeCreateTests(TemporaryMediaMixin, RecipesAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = self.authors[0]
+        self.client.force_authenticate(self.author)
+
+    def make_recipe_data(self, name, ingredient_id=None):
+        return {
+            'name': name,
+            'text': 'text',
+            'image': make_base64_image(),
+            'cooking_time': 5,
+            'tags': [self.tags[0].pk, self.tags[1].pk],
+            'ingredients': [
+                {
+                    'id': ingredient_id or self.ingredients[0].pk,
+                    'amount': 100,
+                }
+            ],
+        }
+
+    def post(self, url_name, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse(url_name), data, format='json')
+
+    def assert_created(self, names, version):
+        recipes = Recipe.objects.filter(author=self.author, name__in=names)
+        self.assertEqual(len(recipes), len(names))
+        self.author.refresh_from_db()
+        self.assertEqual(
+            self.author.recipes_count, self.recipes_per_author + len(names)
+        )
+        self.assertEqual(
+            FeedEntry.objects.filter(
+                user=self.user, recipe__in=recipes
+            ).count(),
+            len(names),
+        )
+        self.assertNotEqual(get_content_version(), version)
+
+    def test_create_single_recipe(self):
+        version = get_content_version()
+        response = self.post('api:recipe-list', self.make_recipe_data('new'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assert_created(['new'], version)
+
+    def test_bulk_create(self):
+        version = get_content_version()
+        data = [self.make_recipe_data(f'new {number}') for number in range(3)]
+        response = self.post('api:recipe-bulk', data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [recipe['name'] for recipe in response.data],
+            ['new 0', 'new 1', 'new 2'],
+        )
+        self.assertEqual(
+            [len(recipe['tags']) for recipe in response.data], [2, 2, 2]
+        )
+        self.assert_created(['new 0', 'new 1', 'new 2'], version)
+
+    def assert_nothing_created(self, response):
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            Recipe.objects.filter(name__startswith='new').exists()
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, self.recipes_per_author)
+
+    def test_bulk_create_item_errors(self):
+        data = [
+            self.make_recipe_data('new 0'),
+            self.make_recipe_data('new 1', ingredient_id=10 ** 6),
+            {**self.make_recipe_data('new 2'), 'cooking_time': 0},
+        ]
+        response = self.post('api:recipe-bulk', data)
+        self.assert_nothing_created(response)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(list(response.data[1]), ['ingredients'])
+        self.assertEqual(list(response.data[2]), ['cooking_time'])
+
+    def test_bulk_create_duplicate_names(self):
+        data = [
+            self.make_recipe_data('new'),
+            self.make_recipe_data('new'),
+            self.make_recipe_data(f'{self.author.username} recipe 0'),
+        ]
+        response = self.post('api:recipe-bulk', data)
+        self.assert_nothing_created(response)
+        self.assertEqual(len(response.data['non_field_errors']), 2)
+
+    @override_settings(RECIPE_BULK_CREATE_MAX_ITEMS=2)
+    def test_bulk_create_too_many_recipes(self):
+        data = [self.make_recipe_data(f'new {number}') for number in range(3)]
+        response = self.post('api:recipe-bulk', data)
+        self.assert_nothing_created(response)
+        self.assertIn('non_field_errors', response.data)
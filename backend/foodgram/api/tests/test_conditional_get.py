@@ -0,0 +1,68 @@
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase
+
+
+class ConditionalGetTests(RecipesAPITestCase):
+    def get_detail(self, **headers):
+        return self.client.get(
+            reverse('api:recipe-detail', args=(self.recipe.pk,)), **headers
+        )
+
+    def test_anonymous_revalidation_by_last_modified(self):
+        response = self.get_detail()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+
+        response = self.get_detail(
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_authenticated_revalidation_after_favorite(self):
+        self.client.force_authenticate(self.user)
+        response = self.get_detail()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_favorited'])
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('api:recipe-favorite', args=(self.recipe.pk,))
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # the client may still send a date it got from another response
+        response = self.get_detail(HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_favorited'])
+
+        response = self.get_detail(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.get_detail(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_subscription_changes_etag(self):
+        self.client.force_authenticate(self.user)
+        etag = self.get_detail()['ETag']
+        self.assertEqual(
+            self.get_detail(HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(
+                    'api:users:user-subscribe', args=(self.recipe.author_id,)
+                )
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.get_detail(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['author']['is_subscribed'])
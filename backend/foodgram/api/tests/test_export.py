@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase
+from users.models import User
+
+
+class ExportTests(RecipesAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(
+            email='admin@foodgram.ru',
+            username='admin',
+            first_name='Admin',
+            last_name='Admin',
+            password='password',
+        )
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **params):
+        response = self.client.get(reverse('api:recipe-export'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b''.join(response.streaming_content).decode()
+        ids = [json.loads(line)['id'] for line in content.splitlines()]
+        return ids, response['X-Export-Watermark']
+
+    def touch_recipe(self):
+        self.recipe.name = 'renamed'
+        self.recipe.save()
+
+    def test_export_all(self):
+        ids, _ = self.export()
+        self.assertEqual(
+            len(ids), len(self.authors) * self.recipes_per_author
+        )
+
+    def test_export_since(self):
+        _, watermark = self.export()
+        self.touch_recipe()
+        ids, next_watermark = self.export(since=watermark)
+        self.assertEqual(ids, [self.recipe.pk])
+        self.assertGreater(next_watermark, watermark)
+
+        ids, last_watermark = self.export(since=next_watermark)
+        self.assertEqual(ids, [])
+        self.assertEqual(last_watermark, next_watermark)
+
+    def test_invalid_since(self):
+        response = self.client.get(
+            reverse('api:recipe-export'), {'since': 'yesterday'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', response.data)
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('api:recipe-export'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_watermark_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        output = os.path.join(directory.name, 'recipes.ndjson')
+        watermark_file = os.path.join(directory.name, 'watermark')
+
+        def run():
+            call_command(
+                'exportdata',
+                output=output,
+                watermark_file=watermark_file,
+                stderr=StringIO(),
+            )
+            with open(output) as file:
+                return [json.loads(line)['id'] for line in file]
+
+        self.assertEqual(
+            len(run()), len(self.authors) * self.recipes_per_author
+        )
+        self.touch_recipe()
+        self.assertEqual(run(), [self.recipe.pk])
+        self.assertEqual(run(), [])
@@ -0,0 +1,89 @@
+import pickle
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase
+from common import feed
+from recipes.models import FeedEntry, Recipe
+
+
+class FeedTests(RecipesAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def get_feed_ids(self):
+        return set(
+            FeedEntry.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )
+        )
+
+    def get_latest_ids(self, authors, limit):
+        return set(
+            Recipe.objects.filter(author__in=authors)
+            .order_by('-created', '-pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+
+    def subscribe_url(self, author):
+        return reverse('api:users:user-subscribe', args=(author.pk,))
+
+    def create_recipe(self, author=None):
+        return Recipe.objects.create(
+            name='new recipe',
+            text='text',
+            image='recipes/images/new.png',
+            cooking_time=1,
+            author=author or self.authors[0],
+        )
+
+    @override_settings(FEED_MAX_ENTRIES=20)
+    def test_subscribe_backfills_and_trims_feed(self):
+        response = self.client.post(self.subscribe_url(self.authors[1]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.get_feed_ids(),
+            self.get_latest_ids(self.authors[:2], limit=20),
+        )
+
+    def test_unsubscribe_removes_author_recipes(self):
+        self.client.post(self.subscribe_url(self.authors[1]))
+        response = self.client.delete(self.subscribe_url(self.authors[0]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.get_feed_ids(),
+            self.get_latest_ids(self.authors[1:2], limit=None),
+        )
+
+    @override_settings(FEED_MAX_ENTRIES=12)
+    def test_new_recipe_added_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            recipe = self.create_recipe()
+        self.assertNotIn(recipe.pk, self.get_feed_ids())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            self.get_feed_ids(),
+            self.get_latest_ids(self.authors[:1], limit=12),
+        )
+        self.assertIn(recipe.pk, self.get_feed_ids())
+
+    def test_recipe_of_other_author_not_added(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = self.create_recipe(self.authors[1])
+        self.assertNotIn(recipe.pk, self.get_feed_ids())
+
+    @override_settings(FEED_FANOUT_WORKERS=1)
+    def test_new_recipe_added_by_workers(self):
+        with mock.patch.object(feed._pool, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe = self.create_recipe()
+        recipes = [(recipe.pk, recipe.author_id, recipe.created)]
+        submit.assert_called_once_with(feed._fan_out_in_worker, recipes)
+        self.assertEqual(pickle.loads(pickle.dumps(recipes)), recipes)
+        self.assertNotIn(recipe.pk, self.get_feed_ids())
@@ -0,0 +1,20 @@
+from api.filters import RecipeFilter
+from api.tests.base import RecipesAPITestCase
+from recipes.models import Recipe
+
+
+class RecipeFilterTests(RecipesAPITestCase):
+    def test_filter_tags_skips_unknown_slugs(self):
+        queryset = Recipe.objects.all()
+        recipe_filter = RecipeFilter(queryset=queryset)
+        filtered = recipe_filter.filter_tags(
+            queryset, 'tags', ['dinner', 'deleted']
+        )
+        self.assertQuerysetEqual(
+            filtered,
+            queryset.filter(tags__slug='dinner'),
+            ordered=False,
+        )
+        self.assertFalse(
+            recipe_filter.filter_tags(queryset, 'tags', ['deleted']).exists()
+        )
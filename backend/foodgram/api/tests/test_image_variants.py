@@ -0,0 +1,105 @@
+import os
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase, TemporaryMediaMixin, make_image
+from common import images
+from recipes.models import Recipe
+
+
+class ImageVariantTests(TemporaryMediaMixin, RecipesAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.name = self.recipe.image.name
+        self.write_image(self.name, (800, 400))
+
+    def write_image(self, name, size):
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(make_image(size=size))
+
+    def get_variant(self, path):
+        return self.client.get(reverse('image-variant', args=(path,)))
+
+    def assert_variant(self, response, image_format, size):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('immutable', response['Cache-Control'])
+        content = b''.join(response.streaming_content)
+        with Image.open(BytesIO(content)) as image:
+            self.assertEqual((image.format, image.size), (image_format, size))
+
+    def test_variant_generated_on_request(self):
+        response = self.get_variant(f'{self.name}/card.jpeg')
+        self.assert_variant(response, 'JPEG', (600, 300))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertTrue(
+            default_storage.exists(
+                images.get_variant_name(self.name, 'card', 'jpeg')
+            )
+        )
+
+        response = self.get_variant(f'{self.name}/thumbnail.webp')
+        self.assert_variant(response, 'WEBP', (150, 75))
+
+    def test_small_image_not_enlarged(self):
+        self.write_image(self.name, (8, 8))
+        response = self.get_variant(f'{self.name}/full.jpeg')
+        self.assert_variant(response, 'JPEG', (8, 8))
+
+    def test_missing_variants(self):
+        other = Recipe.objects.filter(author=self.authors[2]).first()
+        for path in (
+            f'{self.name}/huge.jpeg',
+            f'{self.name}/card.gif',
+            'card.jpeg',
+            # image of no recipe
+            'recipes/images/unknown.png/card.jpeg',
+            # image file is missing
+            f'{other.image.name}/card.jpeg',
+        ):
+            with self.subTest(path=path):
+                response = self.get_variant(path)
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
+
+    def test_variant_urls(self):
+        response = self.client.get(
+            reverse('api:recipe-detail', args=(self.recipe.pk,))
+        )
+        urls = response.data['images']
+        self.assertEqual(set(urls), {'thumbnail', 'card', 'full'})
+        self.assertTrue(
+            urls['card']['webp'].endswith(
+                default_storage.url(
+                    images.get_variant_name(self.name, 'card', 'webp')
+                )
+            )
+        )
+
+    @override_settings(IMAGE_VARIANT_WORKERS=1)
+    def test_variants_generated_in_background(self):
+        with mock.patch.object(images._pool, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.recipe.save()
+        submit.assert_called_once()
+
+        # run the job the worker would run
+        function, *args = submit.call_args.args
+        function(*args)
+        for variant in ('thumbnail', 'card', 'full'):
+            for file_format in images.VARIANT_FORMATS:
+                self.assertTrue(
+                    default_storage.exists(
+                        images.get_variant_name(
+                            self.name, variant, file_format
+                        )
+                    )
+                )
@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from recipes.models import Ingredient, Tag
+from users.models import User
+
+INGREDIENTS = (
+    'name,measurement_unit\n'
+    'ingredient 0,g\n'
+    'salt,g\n'
+    'milk,ml\n'
+)
+TAGS = [
+    {'slug': 'breakfast', 'name': 'Breakfast', 'color': '#E0E0E0'},
+    {'slug': 'snack', 'name': 'snack', 'color': '#E0E0E1'},
+]
+USERS = (
+    'username,first_name,last_name,email,password\n'
+    'user,User,User,user@foodgram.ru,password\n'
+    'new,New,User,new@foodgram.ru,new_password\n'
+)
+
+
+# models are imported by threads with their own database connections, so
+# records they write are seen by tests only outside of a test transaction
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    },
+)
+class ImportDataTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@foodgram.ru',
+            username='user',
+            first_name='User',
+            last_name='User',
+            password='password',
+        )
+        self.tag = Tag.objects.create(
+            slug='breakfast', name='breakfast', color='#000000'
+        )
+        Ingredient.objects.create(name='ingredient 0', measurement_unit='g')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for filename, content in (
+            ('ingredient.csv', INGREDIENTS),
+            ('tag.json', json.dumps(TAGS)),
+            ('user.csv', USERS),
+        ):
+            with open(os.path.join(directory.name, filename), 'w') as file:
+                file.write(content)
+        data_dir_override = override_settings(TEST_DATA_DIR=directory.name)
+        data_dir_override.enable()
+        self.addCleanup(data_dir_override.disable)
+
+    def import_data(self, **options):
+        call_command(
+            'importdata', workers=1, batch_size=2, stdout=StringIO(), **options
+        )
+        return (
+            Ingredient.objects.count(),
+            Tag.objects.count(),
+            User.objects.count(),
+        )
+
+    def assert_idempotent(self, **options):
+        counts = (
+            Ingredient.objects.count() + 2,
+            Tag.objects.count() + 1,
+            User.objects.count() + 1,
+        )
+        self.assertEqual(self.import_data(**options), counts)
+        self.assertEqual(self.import_data(**options), counts)
+
+        # existing records are skipped
+        self.assertEqual(Tag.objects.get(slug='breakfast').name, 'breakfast')
+        self.assertTrue(self.user.check_password('password'))
+        new_user = User.objects.get(username='new')
+        self.assertTrue(new_user.check_password('new_password'))
+
+    def test_import_twice(self):
+        self.assert_idempotent()
+
+    def test_import_twice_without_copy(self):
+        self.assert_idempotent(no_copy=True)
+
+    def test_update(self):
+        counts = self.import_data()
+        self.assertEqual(self.import_data(update=True), counts)
+        breakfast = Tag.objects.get(slug='breakfast')
+        self.assertEqual(
+            (breakfast.name, breakfast.color), ('Breakfast', '#E0E0E0')
+        )
+        self.assertEqual(breakfast.pk, self.tag.pk)
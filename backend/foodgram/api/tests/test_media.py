@@ -0,0 +1,112 @@
+import os
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import (
+    RecipesAPITestCase,
+    TemporaryMediaMixin,
+    make_base64_image,
+    make_image,
+)
+from common.storage import HashedFileSystemStorage
+from recipes.models import RECIPE_IMAGES_DIR, Recipe
+
+
+class HashedStorageTests(TemporaryMediaMixin, RecipesAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = HashedFileSystemStorage()
+
+    def list_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(dirpath, filename), self.media_root)
+            for dirpath, _, filenames in os.walk(self.media_root)
+            for filename in filenames
+        )
+
+    def test_same_content_saved_once(self):
+        first = self.storage.save('images/a.PNG', ContentFile(b'content'))
+        second = self.storage.save('images/b.png', ContentFile(b'content'))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^images/[0-9a-f]{64}\.png$')
+        self.assertEqual(self.list_files(), [first])
+
+    def test_concurrent_save_returns_hashed_name(self):
+        first = self.storage.save('images/a.png', ContentFile(b'content'))
+        # another upload checked the name before the first one was written
+        with mock.patch.object(self.storage, 'exists', return_value=False):
+            second = self.storage.save('images/b.png', ContentFile(b'other'))
+            third = self.storage.save('images/c.png', ContentFile(b'content'))
+        self.assertEqual(third, first)
+        self.assertEqual(self.list_files(), sorted((first, second)))
+        with self.storage.open(first) as file:
+            self.assertEqual(file.read(), b'content')
+
+    def test_images_of_authors_shared(self):
+        names = []
+        for author in self.authors[:2]:
+            self.client.force_authenticate(author)
+            response = self.client.post(
+                reverse('api:recipe-list'),
+                {
+                    'name': 'new',
+                    'text': 'text',
+                    'image': make_base64_image(),
+                    'cooking_time': 5,
+                    'tags': [self.tags[0].pk],
+                    'ingredients': [
+                        {'id': self.ingredients[0].pk, 'amount': 100}
+                    ],
+                },
+                format='json',
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            names.append(Recipe.objects.get(pk=response.data['id']).image)
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(os.path.dirname(names[0].name), RECIPE_IMAGES_DIR)
+
+
+class CleanMediaTests(TemporaryMediaMixin, RecipesAPITestCase):
+    def create_file(self, name, age):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(make_image())
+        modified = time.time() - age
+        os.utime(path, (modified, modified))
+        return path
+
+    def test_referenced_files_kept(self):
+        referenced = self.recipe.image.name
+        variants_dir = settings.IMAGE_VARIANTS_DIR
+        kept = [
+            self.create_file(referenced, age=7200),
+            self.create_file(
+                f'{variants_dir}/{referenced}/card.jpeg', age=7200
+            ),
+            self.create_file(f'{RECIPE_IMAGES_DIR}/fresh.png', age=0),
+        ]
+        removed = [
+            self.create_file(f'{RECIPE_IMAGES_DIR}/unused.png', age=7200),
+            self.create_file(
+                f'{variants_dir}/{RECIPE_IMAGES_DIR}/unused.png/card.jpeg',
+                age=7200,
+            ),
+        ]
+
+        call_command('cleanmedia', '--dry-run', stdout=StringIO())
+        for path in kept + removed:
+            self.assertTrue(os.path.exists(path), path)
+
+        call_command('cleanmedia', stdout=StringIO())
+        for path in kept:
+            self.assertTrue(os.path.exists(path), path)
+        for path in removed:
+            self.assertFalse(os.path.exists(path), path)
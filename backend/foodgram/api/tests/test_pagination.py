@@ -0,0 +1,74 @@
+import base64
+import json
+from urllib.parse import parse_qs, urlparse
+
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase
+
+
+def encode_cursor(position, reverse=False):
+    cursor = json.dumps({'p': position, 'r': reverse})
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def decode_cursor(url):
+    encoded = parse_qs(urlparse(url).query)['cursor'][0]
+    return json.loads(base64.urlsafe_b64decode(encoded.encode()))
+
+
+class KeysetPaginationTests(RecipesAPITestCase):
+    def get_page(self, cursor, limit=6):
+        return self.client.get(
+            reverse('api:recipe-list'), {'cursor': cursor, 'limit': limit}
+        )
+
+    def test_pages_follow_each_other(self):
+        response = self.get_page('')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page = [recipe['id'] for recipe in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        second_page = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(len(second_page), 6)
+        self.assertFalse(set(first_page) & set(second_page))
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            first_page,
+        )
+
+    def test_tampered_cursor(self):
+        # recipes are ordered by -created, name and pk
+        position = decode_cursor(self.get_page('').data['next'])['p']
+        tampered_values = [
+            (index, value)
+            for index in range(len(position))
+            for value in (None, [1], {'id': 1})
+        ]
+        tampered_values += [(0, 'yesterday'), (0, 1), (2, 'first')]
+        for index, value in tampered_values:
+            tampered = list(position)
+            tampered[index] = value
+            with self.subTest(index=index, value=value):
+                response = self.get_page(encode_cursor(tampered))
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
+
+    def test_malformed_cursor(self):
+        position = decode_cursor(self.get_page('').data['next'])['p']
+        for cursor in (
+            'not base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            encode_cursor(position[:-1]),
+            encode_cursor('not a list'),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.get_page(cursor)
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase
+from recipes.models import FavoriteRecipe, Recipe
+
+
+class RecipeQueriesTests(RecipesAPITestCase):
+    """
+    Number of queries of recipe responses doesn't depend on the number of
+    recipes, related records are prefetched for the whole page.
+    """
+
+    # count, recipes, authors, tags, ingredients
+    LIST_QUERIES = 5
+    # recipe, author, tags, ingredients
+    DETAIL_QUERIES = 4
+    # validators, favorites and cart of the user
+    USER_QUERIES = 3
+
+    def setUp(self):
+        super().setUp()
+        self.user_queries = 0
+
+    def authenticate(self):
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.recipe)
+        self.client.force_authenticate(self.user)
+        self.user_queries = self.USER_QUERIES
+
+    def get_list(self, limit):
+        # membership ids of the user are cached by the previous request
+        cache.clear()
+        with self.assertNumQueries(self.LIST_QUERIES + self.user_queries):
+            response = self.client.get(
+                reverse('api:recipe-list'), {'limit': limit}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), limit)
+        return response.data['results']
+
+    def get_detail(self, recipe):
+        cache.clear()
+        with self.assertNumQueries(self.DETAIL_QUERIES + self.user_queries):
+            response = self.client.get(
+                reverse('api:recipe-detail', args=(recipe.pk,))
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assert_user_flags(self, recipe):
+        self.assertEqual(
+            recipe['author']['is_subscribed'],
+            recipe['author']['id'] == self.authors[0].pk,
+        )
+        self.assertEqual(
+            recipe['is_favorited'], recipe['id'] == self.recipe.pk
+        )
+        self.assertFalse(recipe['is_in_shopping_cart'])
+
+    def test_list(self):
+        self.get_list(6)
+        self.get_list(30)
+
+    def test_detail(self):
+        self.get_detail(self.recipe)
+
+    def test_authenticated_list(self):
+        self.authenticate()
+        for limit in (6, 30):
+            for recipe in self.get_list(limit):
+                self.assert_user_flags(recipe)
+
+    def test_authenticated_detail(self):
+        self.authenticate()
+        subscribed_recipe = Recipe.objects.filter(
+            author=self.authors[0]
+        ).first()
+        for recipe in (self.recipe, subscribed_recipe):
+            self.assert_user_flags(self.get_detail(recipe))
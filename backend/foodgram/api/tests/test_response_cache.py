@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase
+from common.cache import bump_content_version
+
+
+class AnonymousResponseCacheTests(RecipesAPITestCase):
+    def get_detail(self):
+        return self.client.get(
+            reverse('api:recipe-detail', args=(self.recipe.pk,))
+        )
+
+    def rename_recipe(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.name = name
+            self.recipe.save()
+
+    def test_new_version_refreshes_cached_response(self):
+        self.assertEqual(self.get_detail().data['name'], self.recipe.name)
+        self.rename_recipe('renamed')
+        self.assertEqual(self.get_detail().data['name'], 'renamed')
+
+    def test_stale_response_while_refreshing(self):
+        original_name = self.recipe.name
+        self.get_detail()
+        self.rename_recipe('renamed')
+
+        # another request holds the lock and refreshes the response
+        with mock.patch.object(cache, 'add', return_value=False):
+            response = self.get_detail()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], original_name)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.get_detail()
+        self.assertEqual(response.data['name'], 'renamed')
+        self.assertIn('ETag', response)
+
+    def test_new_version_keeps_other_responses(self):
+        self.get_detail()
+        bump_content_version()
+        with mock.patch.object(cache, 'add', return_value=False):
+            with self.assertNumQueries(0):
+                response = self.get_detail()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cached_response_without_queries(self):
+        response = self.get_detail()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_detail().data, response.data)
+            response = self.client.get(
+                reverse('api:recipe-detail', args=(self.recipe.pk,)),
+                HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import RecipesAPITestCase
+from recipes.models import Recipe
+from users.models import Subscribe
+
+
+class SubscriptionsTests(RecipesAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def get_subscriptions(self, **params):
+        response = self.client.get(
+            reverse('api:users:user-subscriptions'), params
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def get_latest_ids(self, author, limit):
+        return list(
+            Recipe.objects.filter(author=author)
+            .order_by('-created', 'name', 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+
+    def test_latest_recipes_of_each_author(self):
+        Subscribe.objects.create(user=self.user, author=self.authors[1])
+        subscriptions = self.get_subscriptions(recipes_limit=3)
+        self.assertEqual(
+            [author['id'] for author in subscriptions],
+            [self.authors[0].pk, self.authors[1].pk],
+        )
+        for author, subscription in zip(self.authors, subscriptions):
+            self.assertEqual(
+                [recipe['id'] for recipe in subscription['recipes']],
+                self.get_latest_ids(author, 3),
+            )
+            self.assertEqual(
+                subscription['recipes_count'], self.recipes_per_author
+            )
+
+    @override_settings(SUBSCRIPTION_RECIPES_LIMIT=5)
+    def test_recipes_limit_bounded(self):
+        for recipes_limit in ('', 'all', 0, 100):
+            with self.subTest(recipes_limit=recipes_limit):
+                subscription = self.get_subscriptions(
+                    recipes_limit=recipes_limit
+                )[0]
+                self.assertEqual(len(subscription['recipes']), 5)
+
+    def test_queries_independent_of_authors(self):
+        with CaptureQueriesContext(connection) as one_author:
+            self.get_subscriptions()
+        for author in self.authors[1:]:
+            Subscribe.objects.create(user=self.user, author=author)
+        with self.assertNumQueries(len(one_author)):
+            subscriptions = self.get_subscriptions()
+        self.assertEqual(len(subscriptions), len(self.authors))
@@ -0,0 +1,112 @@
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import (
+    RecipesAPITestCase,
+    TemporaryMediaMixin,
+    make_base64_image,
+    make_image,
+)
+from recipes.models import Recipe
+
+
+class MultipartUploadTests(TemporaryMediaMixin, RecipesAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.authors[0])
+
+    def post(self, data, image=None, **kwargs):
+        data = {
+            'name': 'new',
+            'text': 'text',
+            'cooking_time': 5,
+            'image': SimpleUploadedFile(
+                'image.png', image or make_image(), content_type='image/png'
+            ),
+            **data,
+        }
+        return self.client.post(
+            reverse('api:recipe-list'), data, format='multipart', **kwargs
+        )
+
+    def assert_created(self, response):
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(pk=response.data['id'])
+        self.assertEqual(
+            set(recipe.tags.values_list('pk', flat=True)),
+            {self.tags[0].pk, self.tags[1].pk},
+        )
+        ingredients = recipe.ingredient_recipes.values_list(
+            'ingredient', 'amount'
+        )
+        self.assertEqual(list(ingredients), [(self.ingredients[0].pk, 10)])
+        self.assertTrue(recipe.image.name.endswith('.png'))
+
+    def assert_image_rejected(self, response):
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', response.data)
+        self.assertFalse(Recipe.objects.filter(name='new').exists())
+
+    def test_form_field_names(self):
+        response = self.post(
+            {
+                'tags': [self.tags[0].pk, self.tags[1].pk],
+                'ingredients[0]id': self.ingredients[0].pk,
+                'ingredients[0]amount': 10,
+            }
+        )
+        self.assert_created(response)
+
+    def test_json_encoded_fields(self):
+        response = self.post(
+            {
+                'tags': json.dumps([self.tags[0].pk, self.tags[1].pk]),
+                'ingredients': json.dumps(
+                    [{'id': self.ingredients[0].pk, 'amount': 10}]
+                ),
+            }
+        )
+        self.assert_created(response)
+
+    def test_missing_ingredients(self):
+        response = self.post({'tags': [self.tags[0].pk]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data), ['ingredients'])
+
+    @override_settings(RECIPE_IMAGE_MAX_SIZE=1024)
+    def test_oversize_image(self):
+        response = self.post(
+            {'tags': [self.tags[0].pk]}, image=make_image() + bytes(1024)
+        )
+        self.assert_image_rejected(response)
+
+    @override_settings(RECIPE_IMAGE_MAX_SIZE=1024)
+    def test_oversize_base64_image(self):
+        response = self.client.post(
+            reverse('api:recipe-list'),
+            {
+                'name': 'new',
+                'text': 'text',
+                'cooking_time': 5,
+                'image': make_base64_image(size=(256, 256)) + 'A' * 2048,
+                'tags': [self.tags[0].pk],
+                'ingredients': [{'id': self.ingredients[0].pk, 'amount': 10}],
+            },
+            format='json',
+        )
+        self.assert_image_rejected(response)
+
+    def test_invalid_image(self):
+        response = self.post(
+            {'tags': [self.tags[0].pk]}, image=b'not an image'
+        )
+        self.assert_image_rejected(response)
+
+    @override_settings(RECIPE_IMAGE_MAX_DIMENSION=4)
+    def test_image_dimensions(self):
+        response = self.post({'tags': [self.tags[0].pk]})
+        self.assert_image_rejected(response)
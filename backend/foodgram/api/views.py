@@ -1,56 +1,108 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Exists, OuterRef, Value
-from django.http import HttpResponse
+from django.db.models import Exists, F, OuterRef, Prefetch, Value
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
 from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import (
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
 from rest_framework.response import Response
-from weasyprint import HTML
+from rest_framework.reverse import reverse
 
+from api.catalog import INGREDIENT_CATALOG, TAG_CATALOG, CatalogMixin
 from api.filters import IngredientSearchFilter, RecipeFilter
+from api.mixins import AnonymousResponseCacheMixin, ConditionalGetMixin
 from api.permissions import OwnerOrAdmin, ReadOnly
 from api.serializers import (
     IngredientSerializer,
-    ReadOnlyIngredientAmountSerializer,
     ReadOnlyRecipeSerializer,
     RecipeSerializer,
     TagSerializer,
 )
-from common.paginators import DynamicLimitPaginator
+from common import export, images, pdf, shopping_cart
+from common.membership import contains, get_recipe_ids, get_versions
+from common.paginators import (
+    KeysetDynamicLimitPaginator,
+    KeysetOnlyDynamicLimitPaginator,
+)
 from common.serializers import SimpleRecipeSerializer
-from common.utils import build_ingredients_summary, follow, unfollow
+from common.uploads import LimitedTemporaryFileUploadHandler
+from common.utils import follow, unfollow
 from recipes.models import (
     FavoriteRecipe,
     InCartRecipe,
     Ingredient,
+    IngredientRecipe,
     Recipe,
     Tag,
 )
+from users.models import Subscribe
 
 User = get_user_model()
 
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
 
-class TagReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagReadOnlyViewSet(
+    CatalogMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    catalog = TAG_CATALOG
     permission_classes = (IsAdminUser | ReadOnly,)
 
 
-class IngredientReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientReadOnlyViewSet(
+    CatalogMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    catalog = INGREDIENT_CATALOG
     filter_backends = (IngredientSearchFilter,)
     permission_classes = (IsAdminUser | ReadOnly,)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ConditionalGetMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet
+):
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly,)
     filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
     filterset_class = RecipeFilter
-    pagination_class = DynamicLimitPaginator
+    ordering_fields = (
+        'id',
+        'name',
+        'cooking_time',
+        'created',
+        'favorites_count',
+        'cart_count',
+    )
+    pagination_class = KeysetDynamicLimitPaginator
+
+    def initial(self, request, *args, **kwargs):
+        # Images of multipart requests are streamed to temporary files and
+        # moved into storage from there instead of being kept in memory
+        if self.action in ('create', 'update', 'partial_update'):
+            request._request.upload_handlers = [
+                LimitedTemporaryFileUploadHandler(
+                    request._request, settings.RECIPE_IMAGE_MAX_SIZE
+                )
+            ]
+        super().initial(request, *args, **kwargs)
 
     def get_permissions(self):
         if self.action in ('update', 'partial_update', 'destroy'):
@@ -58,23 +110,69 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_queryset(self):
+        """
+        Return recipes with related objects prefetched.
+
+        is_favorited and is_in_shopping_cart are False here, real values
+        are set by annotate_membership only for the recipes on the page.
+        """
         user = self.request.user
-        favorited, in_shopping_cart = Value(False), Value(False)
+        subscribed = Value(False)
         if not user.is_anonymous:
-            favorites = user.favorite_recipes.filter(recipe__id=OuterRef('id'))
-            in_cart_recipes = user.cart_recipes.filter(
-                recipe__id=OuterRef('id')
+            subscribed = Exists(
+                Subscribe.objects.filter(author=OuterRef('id'), user=user)
             )
-            favorited = Exists(favorites)
-            in_shopping_cart = Exists(in_cart_recipes)
         return (
             Recipe.objects.all()
-            .annotate(is_favorited=favorited)
-            .annotate(is_in_shopping_cart=in_shopping_cart)
+            .annotate(is_favorited=Value(False))
+            .annotate(is_in_shopping_cart=Value(False))
+            .prefetch_related(
+                Prefetch(
+                    'author',
+                    queryset=User.objects.annotate(is_subscribed=subscribed),
+                ),
+                'tags',
+                Prefetch(
+                    'ingredient_recipes',
+                    queryset=IngredientRecipe.objects.select_related(
+                        'ingredient'
+                    ),
+                ),
+            )
         )
 
+    def annotate_membership(self, recipes):
+        user = self.request.user
+        if user.is_anonymous:
+            return
+        favorites = get_recipe_ids(user, FavoriteRecipe)
+        in_cart_recipes = get_recipe_ids(user, InCartRecipe)
+        for recipe in recipes:
+            recipe.is_favorited = contains(favorites, recipe.id)
+            recipe.is_in_shopping_cart = contains(in_cart_recipes, recipe.id)
+
+    def get_user_validators(self):
+        user = self.request.user
+        if user.is_anonymous:
+            return ()
+        return (
+            user.pk,
+            *get_versions(user.pk, (FavoriteRecipe, InCartRecipe, Subscribe)),
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            self.annotate_membership(page)
+        return page
+
+    def get_object(self):
+        recipe = super().get_object()
+        self.annotate_membership((recipe,))
+        return recipe
+
     def get_serializer_class(self):
-        if self.action in ('create', 'update', 'partial_update'):
+        if self.action in ('create', 'update', 'partial_update', 'bulk'):
             return RecipeSerializer
         elif self.action in ('favorite', 'shopping_cart'):
             return SimpleRecipeSerializer
@@ -83,39 +181,169 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(
+        detail=False, methods=['post'], permission_classes=[IsAuthenticated]
+    )
+    def bulk(self, request):
+        """Create recipes from the list, all or none of them."""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        pagination_class=KeysetOnlyDynamicLimitPaginator,
+    )
+    def feed(self, request):
+        """
+        Return recipes of authors the user is subscribed to, newest first.
+
+        Recipes are read from the user's feed entries in their index order,
+        so every page is a range of the index.
+        """
+        recipes = (
+            self.get_queryset()
+            .filter(feed_entries__user=request.user)
+            .annotate(feed_created=F('feed_entries__created'))
+            .order_by('-feed_created', '-pk')
+        )
+        page = self.paginate_queryset(recipes)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=False, permission_classes=[OwnerOrAdmin])
     def download_shopping_cart(self, request):
         user = request.user
+        file_format = request.query_params.get('format', 'pdf')
+        if file_format in shopping_cart.STREAM_FORMATS:
+            return self.stream_shopping_cart(file_format)
+        if file_format != 'pdf':
+            raise ValidationError(
+                {'format': [_('Unsupported shopping list format.')]}
+            )
 
-        recipes, ingredients = [], []
+        digest = shopping_cart.get_digest(user)
+        file = pdf.open_cached(digest) if digest else None
+        if file is not None:
+            return self.get_shopping_cart_pdf_response(file)
 
-        if user.cart_recipes.count() == 0:
+        context = shopping_cart.get_shopping_cart(user)
+        if context is None:
             return Response(status=status.HTTP_204_NO_CONTENT)
+        digest = shopping_cart.build_digest(context)
+        shopping_cart.set_digest(user, digest)
+        file = pdf.open_cached(digest)
+        if file is not None:
+            return self.get_shopping_cart_pdf_response(file)
 
-        for recipe_cart in user.cart_recipes.all():
-            serializer = ReadOnlyIngredientAmountSerializer(
-                recipe_cart.recipe.ingredient_recipes,
-                many=True,
-                read_only=True,
-            )
-            recipes.append(recipe_cart.recipe.name)
-            ingredients.append(serializer.data)
+        html_string = render_to_string('shopping_cart_template.html', context)
+        size = len(context['recipes']) + len(context['ingredients'])
+        if not pdf.is_async_enabled(size):
+            content = pdf.render_pdf(html_string)
+            pdf.store(digest, content)
+            return self.get_shopping_cart_pdf_response(content)
 
-        context = {
-            'recipes': recipes,
-            'ingredients': build_ingredients_summary(ingredients),
-        }
+        pdf.submit_job(html_string, user.pk, digest)
+        return self.get_shopping_cart_job_response(digest)
 
-        html_string = render_to_string('shopping_cart_template.html', context)
-        html = HTML(string=html_string)
-        pdf = html.write_pdf()
+    def stream_shopping_cart(self, file_format):
+        user = self.request.user
+        recipes = shopping_cart.get_cart_recipes(user)
+        if not recipes:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        generate, content_type = shopping_cart.STREAM_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            generate(recipes, shopping_cart.iter_cart_ingredients(user)),
+            content_type=content_type,
+        )
+        response[
+            'Content-Disposition'
+        ] = f'attachment; filename="shopping_cart.{file_format}"'
+        return response
 
-        response = HttpResponse(pdf, content_type='application/pdf')
+    @action(detail=False, permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Stream recipes modified after since query parameter, or all of them,
+        as NDJSON or CSV. X-Export-Watermark header is since of the next
+        incremental export.
+        """
+        file_format = request.query_params.get('format', 'ndjson')
+        if file_format not in export.EXPORT_FORMATS:
+            raise ValidationError(
+                {'format': [_('Unsupported export format.')]}
+            )
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = export.parse_watermark(since)
+            except ValueError:
+                raise ValidationError({'since': [_('Invalid date and time.')]})
+
+        recipes, watermark = export.get_export(since)
+        generate, content_type = export.EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            generate(recipes), content_type=content_type
+        )
         response[
             'Content-Disposition'
-        ] = 'inline; filename="shopping_cart.pdf"'
+        ] = f'attachment; filename="recipes.{file_format}"'
+        if watermark is not None:
+            response['X-Export-Watermark'] = watermark.isoformat()
         return response
 
+    def perform_content_negotiation(self, request, force=False):
+        # format query parameter of download_shopping_cart and export is the
+        # format of the file, not of the API response
+        if self.action in ('download_shopping_cart', 'export'):
+            force = True
+        return super().perform_content_negotiation(request, force)
+
+    def get_shopping_cart_pdf_response(self, content):
+        if isinstance(content, bytes):
+            response = HttpResponse(content, content_type='application/pdf')
+            response[
+                'Content-Disposition'
+            ] = 'inline; filename="shopping_cart.pdf"'
+            return response
+        return FileResponse(
+            content,
+            content_type='application/pdf',
+            filename='shopping_cart.pdf',
+        )
+
+    def get_shopping_cart_job_response(self, job_id):
+        url = reverse(
+            'api:recipe-shopping-cart-job',
+            kwargs={'job_id': job_id},
+            request=self.request,
+        )
+        return Response(
+            {'status': pdf.PENDING, 'url': url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url, 'Retry-After': '1'},
+        )
+
+    @action(
+        detail=False,
+        url_path=r'download_shopping_cart/(?P<job_id>[0-9a-f]{64})',
+        permission_classes=[OwnerOrAdmin],
+    )
+    def shopping_cart_job(self, request, job_id):
+        state, file = pdf.get_job(request.user.pk, job_id)
+        if state is None:
+            raise Http404
+        if state == pdf.PENDING:
+            return self.get_shopping_cart_job_response(job_id)
+        if state == pdf.FAILED:
+            return Response(
+                {'status': pdf.FAILED},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return self.get_shopping_cart_pdf_response(file)
+
     @action(detail=True, methods=['post'])
     def shopping_cart(self, request, pk=None):
         return follow(self, request, pk, Recipe, 'recipe', InCartRecipe)
@@ -131,3 +359,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @favorite.mapping.delete
     def unfavorite(self, request, pk=None):
         return unfollow(request, pk, 'recipe', FavoriteRecipe)
+
+
+@require_GET
+def image_variant(request, path):
+    """
+    Serve variant of recipe image, generating it if it's missing.
+
+    Web server serves variant files that exist and passes requests for
+    missing ones here, so every variant is generated once.
+    """
+    variant = images.parse_variant_name(path)
+    if variant is None:
+        raise Http404
+    name, variant, file_format = variant
+    if not Recipe.objects.filter(image=name).exists():
+        raise Http404
+    try:
+        variant_path = images.get_variant(name, variant, file_format)
+    except FileNotFoundError:
+        raise Http404
+    _, _, content_type = images.VARIANT_FORMATS[file_format]
+    response = FileResponse(
+        open(variant_path, 'rb'), content_type=content_type
+    )
+    # variants of an image name never change
+    patch_cache_control(
+        response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+    )
+    return response
@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'common'
+
+    def ready(self):
+        from common.cache import connect_content_version
+        from common.counters import connect_counters
+        from common.feed import connect_feed
+        from common.images import connect_image_variants
+        from common.membership import connect_membership
+        from common.search import connect_search_vector
+        from common.shopping_cart import connect_shopping_cart
+        from common.signals import connect_recipes_created
+
+        connect_content_version()
+        connect_counters()
+        connect_feed()
+        connect_image_variants()
+        connect_membership()
+        connect_search_vector()
+        connect_shopping_cart()
+        connect_recipes_created()
@@ -0,0 +1,106 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from common.signals import recipes_created
+from recipes.models import (
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    Tag,
+    TagRecipe,
+)
+from users.models import User
+
+CONTENT_VERSION_KEY = 'recipes-content-version'
+CONTENT_MODELS = (Recipe, TagRecipe, IngredientRecipe, Tag, Ingredient, User)
+
+
+def get_content_version() -> int:
+    """
+    Return version of content shown in recipe responses.
+
+    The version is the time of the last change in nanoseconds since epoch.
+    """
+    return cache.get_or_set(CONTENT_VERSION_KEY, time.time_ns, None)
+
+
+def bump_content_version():
+    """Change content version so that cached responses are not used."""
+    cache.set(CONTENT_VERSION_KEY, time.time_ns(), None)
+
+
+def _bump_on_change(
+    sender, update_fields=None, action='post', created=False, **kwargs
+):
+    if action.startswith('pre_'):
+        return
+    if created and sender is Recipe and not kwargs.get('raw'):
+        # bumped by recipes_created
+        return
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(bump_content_version)
+
+
+def connect_content_version():
+    """Bump content version when recipes or related records change."""
+    for model in CONTENT_MODELS:
+        uid = f'content-version.{model._meta.model_name}'
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=uid)
+    recipes_created.connect(
+        _bump_on_change, sender=Recipe, dispatch_uid='content-version.created'
+    )
+    for through_model in (Recipe.tags.through, Recipe.ingredients.through):
+        uid = f'content-version.m2m.{through_model._meta.model_name}'
+        m2m_changed.connect(
+            _bump_on_change, sender=through_model, dispatch_uid=uid
+        )
+
+
+def build_cache_key(prefix, *parts):
+    digest = hashlib.sha1(
+        '\n'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def get_or_refresh(key, compute, timeout, stale_timeout, version=None):
+    """
+    Return (value, stale) of the cached value for the key or compute and
+    cache it.
+
+    The value is fresh for timeout seconds and is kept stale for
+    stale_timeout seconds more. The value cached for another version is
+    stale too, so a new version doesn't expire all values at once. When
+    the value is stale only one caller refreshes it, others get the stale
+    value meanwhile, so expiration doesn't lead to a burst of identical
+    computations.
+
+    compute returns None if the value must not be cached.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, entry_version, value = entry
+        if fresh_until > time.time() and entry_version == version:
+            return value, False
+        lock_acquired = cache.add(f'{key}:lock', True, stale_timeout)
+        if not lock_acquired:
+            return value, True
+
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(
+                key,
+                (time.time() + timeout, version, value),
+                timeout + stale_timeout,
+            )
+    finally:
+        if entry is not None:
+            cache.delete(f'{key}:lock')
+    return value, False
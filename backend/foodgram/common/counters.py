@@ -0,0 +1,109 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+
+from common.signals import recipes_created
+from recipes.models import FavoriteRecipe, InCartRecipe, Recipe
+from users.models import Subscribe, User
+
+# (source model, counter model, source foreign key, counter field)
+COUNTERS = (
+    (FavoriteRecipe, Recipe, 'recipe', 'favorites_count'),
+    (InCartRecipe, Recipe, 'recipe', 'cart_count'),
+    (Recipe, User, 'author', 'recipes_count'),
+    (Subscribe, User, 'author', 'subscribers_count'),
+)
+
+
+def shift_counter(model, pk, field: str, delta: int):
+    """
+    Add delta to the counter field of the model record in a single UPDATE.
+
+    The new value is computed by the database (field = field + delta), so
+    concurrent writers don't lose increments. The counter is never
+    decremented below zero even if it has drifted from the real value.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def _make_receivers(counter_model, source_field, counter_field):
+    attname = f'{source_field}_id'
+
+    def on_create(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            shift_counter(
+                counter_model, getattr(instance, attname), counter_field, 1
+            )
+
+    def on_create_many(sender, recipes, **kwargs):
+        deltas = Counter(getattr(recipe, attname) for recipe in recipes)
+        for pk, delta in deltas.items():
+            shift_counter(counter_model, pk, counter_field, delta)
+
+    def on_delete(sender, instance, **kwargs):
+        shift_counter(
+            counter_model, getattr(instance, attname), counter_field, -1
+        )
+
+    return on_create, on_create_many, on_delete
+
+
+def connect_counters():
+    """Keep denormalized counters in sync with the source tables."""
+    for source_model, counter_model, source_field, counter_field in COUNTERS:
+        on_create, on_create_many, on_delete = _make_receivers(
+            counter_model, source_field, counter_field
+        )
+        uid = f'{counter_model.__name__}.{counter_field}'
+        if source_model is Recipe:
+            # bulk inserts of recipes send recipes_created as well
+            recipes_created.connect(
+                on_create_many, sender=Recipe, weak=False, dispatch_uid=uid
+            )
+        else:
+            post_save.connect(
+                on_create, sender=source_model, weak=False, dispatch_uid=uid
+            )
+        post_delete.connect(
+            on_delete, sender=source_model, weak=False, dispatch_uid=uid
+        )
+
+
+@transaction.atomic
+def reconcile_counters(dry_run=False):
+    """
+    Recalculate denormalized counters from the source tables.
+
+    Returns dict where key is a counter name and value is a number of
+    records which counter has drifted from the real value.
+    """
+    drifted = {}
+    for source_model, counter_model, source_field, counter_field in COUNTERS:
+        actual = Coalesce(
+            Subquery(
+                source_model.objects.filter(**{source_field: OuterRef('pk')})
+                .order_by()
+                .values(source_field)
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+        stale = (
+            counter_model.objects.annotate(actual=actual)
+            .filter(~Q(**{counter_field: F('actual')}))
+            .values_list('pk', flat=True)
+        )
+        name = f'{counter_model.__name__}.{counter_field}'
+        drifted[name] = stale.count()
+        if drifted[name] and not dry_run:
+            counter_model.objects.filter(pk__in=list(stale)).update(
+                **{counter_field: actual}
+            )
+    return drifted
@@ -0,0 +1,150 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from common.utils import Echo
+from recipes.models import IngredientRecipe, Recipe
+
+EXPORT_FIELDS = (
+    'id',
+    'name',
+    'text',
+    'image',
+    'cooking_time',
+    'author_id',
+    'author_username',
+    'tags',
+    'ingredients',
+    'created',
+    'modified',
+)
+
+
+def parse_watermark(value):
+    """
+    Return aware datetime of the ISO 8601 watermark, naive values are in
+    the current time zone. Raise ValueError if the value is malformed.
+    """
+    watermark = parse_datetime(value)
+    if watermark is None:
+        raise ValueError(value)
+    if timezone.is_aware(watermark):
+        return watermark
+    return timezone.make_aware(watermark)
+
+
+def get_watermark():
+    """
+    Return the latest modified time of recipes or None if there are none.
+
+    Export is limited by the watermark taken before it starts, so recipes
+    changed while it runs are left to the next incremental export.
+    """
+    return Recipe.objects.order_by().aggregate(watermark=Max('modified'))[
+        'watermark'
+    ]
+
+
+def get_export_queryset(watermark, since=None):
+    """Return recipes modified after since and not after the watermark."""
+    queryset = Recipe.objects.filter(modified__lte=watermark)
+    if since is not None:
+        queryset = queryset.filter(modified__gt=since)
+    return (
+        queryset.select_related('author')
+        .prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_recipes',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+        .order_by('modified', 'pk')
+    )
+
+
+def iter_recipes(watermark, since=None, chunk_size=None):
+    """
+    Return iterator over recipes to export.
+
+    Recipes are read by a server-side cursor in chunks and related tags
+    and ingredients are prefetched per chunk, so memory doesn't depend on
+    the number of recipes.
+    """
+    return get_export_queryset(watermark, since).iterator(
+        chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def get_export(since=None, chunk_size=None):
+    """
+    Return (recipes, watermark) of the export of recipes modified after
+    since. Watermark is since of the next incremental export, it's None
+    only if there are no recipes at all.
+    """
+    watermark = get_watermark()
+    if watermark is None or (since is not None and watermark <= since):
+        return iter(()), since
+    return iter_recipes(watermark, since, chunk_size), watermark
+
+
+def build_export_record(recipe):
+    return {
+        'id': recipe.pk,
+        'name': recipe.name,
+        'text': recipe.text,
+        'image': recipe.image.name,
+        'cooking_time': recipe.cooking_time,
+        'author_id': recipe.author_id,
+        'author_username': recipe.author.username,
+        'tags': [tag.slug for tag in recipe.tags.all()],
+        'ingredients': [
+            {
+                'id': ingredient_recipe.ingredient_id,
+                'name': ingredient_recipe.ingredient.name,
+                'measurement_unit': (
+                    ingredient_recipe.ingredient.measurement_unit
+                ),
+                'amount': ingredient_recipe.amount,
+            }
+            for ingredient_recipe in recipe.ingredient_recipes.all()
+        ],
+        'created': recipe.created,
+        'modified': recipe.modified,
+    }
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, cls=DjangoJSONEncoder)
+
+
+def stream_ndjson(recipes):
+    for recipe in recipes:
+        yield _dumps(build_export_record(recipe)) + '\n'
+
+
+def stream_csv(recipes):
+    """Yield CSV rows of recipes, tags and ingredients are JSON encoded."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for recipe in recipes:
+        record = build_export_record(recipe)
+        record['tags'] = _dumps(record['tags'])
+        record['ingredients'] = _dumps(record['ingredients'])
+        record['created'] = record['created'].isoformat()
+        record['modified'] = record['modified'].isoformat()
+        yield writer.writerow(record[field] for field in EXPORT_FIELDS)
+
+
+# Recipes export formats mapped to (generator, content type)
+EXPORT_FORMATS = {
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+}
@@ -0,0 +1,155 @@
+import logging
+from collections import defaultdict
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from common.signals import recipes_created
+from common.utils import get_ranked_ids
+from common.workers import WorkerPool
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe
+
+logger = logging.getLogger(__name__)
+
+_pool = WorkerPool(lambda: settings.FEED_FANOUT_WORKERS, django.setup)
+
+
+def _batches(items, size):
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def trim_feeds(user_ids):
+    """Remove entries of the users' feeds beyond FEED_MAX_ENTRIES newest."""
+    FeedEntry.objects.filter(
+        pk__in=get_ranked_ids(
+            FeedEntry.objects.filter(user__in=user_ids),
+            F('user'),
+            (F('created').desc(), F('recipe').desc()),
+            '>',
+            settings.FEED_MAX_ENTRIES,
+        )
+    ).delete()
+
+
+def fan_out(recipes):
+    """
+    Add new recipes to feeds of their authors' subscribers.
+
+    Recipes are (id, author id, created) tuples. Subscribers are processed
+    in batches of FEED_BATCH_SIZE users, each batch is written by one
+    insert and trimmed by one delete.
+    """
+    recipes_by_author = defaultdict(list)
+    for recipe_id, author_id, created in recipes:
+        recipes_by_author[author_id].append((recipe_id, created))
+    for author_id, author_recipes in recipes_by_author.items():
+        subscribers = list(
+            Subscribe.objects.filter(author_id=author_id).values_list(
+                'user_id', flat=True
+            )
+        )
+        for user_ids in _batches(subscribers, settings.FEED_BATCH_SIZE):
+            FeedEntry.objects.bulk_create(
+                (
+                    FeedEntry(
+                        user_id=user_id, recipe_id=recipe_id, created=created
+                    )
+                    for user_id in user_ids
+                    for recipe_id, created in author_recipes
+                ),
+                batch_size=settings.FEED_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            trim_feeds(user_ids)
+
+
+def backfill(user_id, author_id):
+    """Add latest recipes of the author to the user's feed."""
+    recipes = (
+        Recipe.objects.filter(author_id=author_id)
+        .order_by('-created', '-pk')
+        .values_list('pk', 'created')[: settings.FEED_MAX_ENTRIES]
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=recipe_id, created=created)
+            for recipe_id, created in recipes
+        ),
+        ignore_conflicts=True,
+    )
+    trim_feeds((user_id,))
+
+
+def remove_author(user_id, author_id):
+    """Remove recipes of the author from the user's feed."""
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def _fan_out_in_worker(recipes):
+    try:
+        fan_out(recipes)
+    finally:
+        # workers live longer than any connection should
+        connections.close_all()
+
+
+def _log_failure(future):
+    exception = future.exception()
+    if exception is not None:
+        logger.error('Feed fan-out failed', exc_info=exception)
+
+
+def _submit(recipes):
+    if settings.FEED_FANOUT_WORKERS > 0:
+        future = _pool.submit(_fan_out_in_worker, recipes)
+        future.add_done_callback(_log_failure)
+    else:
+        fan_out(recipes)
+
+
+def schedule_fan_out(recipes):
+    """
+    Add new recipes to feeds of subscribers once the transaction commits,
+    in background if there are workers or after the request's transaction
+    otherwise, so the request doesn't wait for writes to every feed.
+    """
+    recipes = [
+        (recipe.pk, recipe.author_id, recipe.created) for recipe in recipes
+    ]
+    if recipes:
+        transaction.on_commit(lambda: _submit(recipes))
+
+
+def _on_recipes_created(sender, recipes, **kwargs):
+    schedule_fan_out(recipes)
+
+
+def _on_subscribe(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        backfill(instance.user_id, instance.author_id)
+
+
+def _on_unsubscribe(sender, instance, **kwargs):
+    remove_author(instance.user_id, instance.author_id)
+
+
+def connect_feed():
+    """Keep feeds of subscribers in sync with recipes and subscriptions."""
+    recipes_created.connect(
+        _on_recipes_created, sender=Recipe, dispatch_uid='feed.recipe'
+    )
+    post_save.connect(
+        _on_subscribe, sender=Subscribe, dispatch_uid='feed.subscribe'
+    )
+    post_delete.connect(
+        _on_unsubscribe, sender=Subscribe, dispatch_uid='feed.subscribe'
+    )
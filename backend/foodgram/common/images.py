@@ -0,0 +1,187 @@
+import logging
+import os
+import tempfile
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+from common.workers import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Formats of image variants, which are also extensions of their files,
+# mapped to (Pillow format, save options, content type)
+VARIANT_FORMATS = {
+    'jpeg': (
+        'JPEG',
+        {'quality': 85, 'optimize': True, 'progressive': True},
+        'image/jpeg',
+    ),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}, 'image/webp'),
+}
+
+_pool = WorkerPool(lambda: settings.IMAGE_VARIANT_WORKERS)
+
+
+def get_variant_name(name, variant, file_format):
+    """Return storage name of the variant of the image with the name."""
+    return f'{settings.IMAGE_VARIANTS_DIR}/{name}/{variant}.{file_format}'
+
+
+def parse_variant_name(path):
+    """
+    Return (name, variant, format) of the image variant by its path within
+    IMAGE_VARIANTS_DIR or None if the path isn't a variant path.
+    """
+    name, _, filename = path.rpartition('/')
+    variant, _, file_format = filename.partition('.')
+    if (
+        not name
+        or variant not in settings.IMAGE_VARIANT_SIZES
+        or file_format not in VARIANT_FORMATS
+    ):
+        return None
+    return name, variant, file_format
+
+
+def get_variant_urls(name):
+    """Return URLs of all variants of the image by variant and format."""
+    return {
+        variant: {
+            file_format: default_storage.url(
+                get_variant_name(name, variant, file_format)
+            )
+            for file_format in VARIANT_FORMATS
+        }
+        for variant in settings.IMAGE_VARIANT_SIZES
+    }
+
+
+def _get_targets(name):
+    return [
+        (
+            default_storage.path(get_variant_name(name, variant, file_format)),
+            size,
+            file_format,
+        )
+        for variant, size in settings.IMAGE_VARIANT_SIZES.items()
+        for file_format in VARIANT_FORMATS
+    ]
+
+
+def _flatten(image):
+    """Return RGB copy of the image with transparency over white."""
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def _save(image, path, file_format):
+    image_format, options, _ = VARIANT_FORMATS[file_format]
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = _flatten(image)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            image.save(file, image_format, **options)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _generate(source_path, targets):
+    """
+    Write missing variant files of the source image.
+
+    Targets are (path, size, format), the image is resized to fit the size
+    once for all formats and is never enlarged.
+    """
+    missing = [target for target in targets if not os.path.exists(target[0])]
+    if not missing:
+        return
+    with Image.open(source_path) as source:
+        source = ImageOps.exif_transpose(source)
+        resized = {}
+        for path, size, file_format in missing:
+            if size not in resized:
+                image = source.copy()
+                image.thumbnail(size, Image.Resampling.LANCZOS)
+                resized[size] = image
+            _save(resized[size], path, file_format)
+
+
+def get_variant(name, variant, file_format):
+    """
+    Return path of the variant file of the image with the name, generating
+    it if it's missing. Raise FileNotFoundError if the image is missing.
+    """
+    path = default_storage.path(get_variant_name(name, variant, file_format))
+    size = settings.IMAGE_VARIANT_SIZES[variant]
+    _generate(default_storage.path(name), ((path, size, file_format),))
+    return path
+
+
+def _log_failure(name, future):
+    exception = future.exception()
+    if exception is not None:
+        logger.error(
+            'Generation of %s variants failed', name, exc_info=exception
+        )
+
+
+def _submit(names):
+    for name in names:
+        future = _pool.submit(
+            _generate,
+            default_storage.path(name),
+            _get_targets(name),
+        )
+        future.add_done_callback(partial(_log_failure, name))
+
+
+def schedule_variants(names):
+    """
+    Generate variants of the images in background once the transaction
+    commits. Without workers variants are generated on first request.
+    """
+    names = [name for name in names if name]
+    if names and settings.IMAGE_VARIANT_WORKERS > 0:
+        transaction.on_commit(lambda: _submit(names))
+
+
+def _on_recipe_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # scheduled by recipes_created
+        return
+    schedule_variants((instance.image.name,))
+
+
+def _on_recipes_created(sender, recipes, **kwargs):
+    schedule_variants(recipe.image.name for recipe in recipes)
+
+
+def connect_image_variants():
+    """Generate variants of recipe images when recipes are saved."""
+    # workers import this module without setting up Django, so models
+    # are imported only here
+    from common.signals import recipes_created
+    from recipes.models import Recipe
+
+    post_save.connect(
+        _on_recipe_save,
+        sender=Recipe,
+        dispatch_uid='image-variants.recipe',
+    )
+    recipes_created.connect(
+        _on_recipes_created,
+        sender=Recipe,
+        dispatch_uid='image-variants.created',
+    )
@@ -0,0 +1,105 @@
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from recipes.models import FavoriteRecipe, InCartRecipe
+from users.models import Subscribe
+
+MEMBERSHIP_MODELS = (FavoriteRecipe, InCartRecipe)
+# Models of user's records, whose changes are tracked by versions
+VERSIONED_MODELS = (FavoriteRecipe, InCartRecipe, Subscribe)
+
+
+def _cache_key(user_id, through_model):
+    return f'recipe-ids:{through_model._meta.model_name}:{user_id}'
+
+
+def _version_key(user_id, model):
+    return f'membership-version:{model._meta.model_name}:{user_id}'
+
+
+def get_recipe_ids(user, through_model) -> array:
+    """
+    Return sorted array of ids of recipes user has in through_model.
+
+    The array is cached per user as raw bytes of 64-bit integers, so it
+    stays compact both in cache and in memory.
+    """
+    recipe_ids = array('q')
+    if user.is_anonymous:
+        return recipe_ids
+    key = _cache_key(user.pk, through_model)
+    cached = cache.get(key)
+    if cached is None:
+        recipe_ids.extend(
+            through_model.objects.filter(user=user)
+            .order_by('recipe_id')
+            .values_list('recipe_id', flat=True)
+        )
+        cache.set(
+            key,
+            recipe_ids.tobytes(),
+            settings.RECIPE_MEMBERSHIP_CACHE_TIMEOUT,
+        )
+    else:
+        recipe_ids.frombytes(cached)
+    return recipe_ids
+
+
+def contains(recipe_ids: array, recipe_id) -> bool:
+    """Check if recipe_id is in sorted recipe_ids array."""
+    index = bisect_left(recipe_ids, recipe_id)
+    return index < len(recipe_ids) and recipe_ids[index] == recipe_id
+
+
+def get_versions(user_id, models) -> list:
+    """
+    Return versions of user's records of the models.
+
+    A version is the time it was first requested after the last change of
+    the records in nanoseconds since epoch. It changes with every change,
+    so responses depending on the records are validated without reading
+    them.
+    """
+    keys = [_version_key(user_id, model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(user_id, model):
+    """
+    Drop cached recipe ids and version of user's records of the model
+    once the current transaction commits.
+    """
+    keys = [_version_key(user_id, model)]
+    if model in MEMBERSHIP_MODELS:
+        keys.append(_cache_key(user_id, model))
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _invalidate_on_change(sender, instance, **kwargs):
+    invalidate(instance.user_id, sender)
+
+
+def connect_membership():
+    """
+    Invalidate cached recipe ids and versions when user's favorites, cart
+    or subscriptions change.
+    """
+    for through_model in VERSIONED_MODELS:
+        uid = f'membership.{through_model._meta.model_name}'
+        post_save.connect(
+            _invalidate_on_change, sender=through_model, dispatch_uid=uid
+        )
+        post_delete.connect(
+            _invalidate_on_change, sender=through_model, dispatch_uid=uid
+        )
@@ -1,6 +1,191 @@
+import base64
+import binascii
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DynamicLimitPaginator(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class KeysetDynamicLimitPaginator(DynamicLimitPaginator):
+    """
+    Page number paginator with opt-in keyset (cursor) pagination mode.
+
+    Keyset mode is turned on by the cursor query parameter, which is empty
+    for the first page. Records are ordered by the queryset ordering (model
+    default ordering if queryset is not ordered) with primary key as a
+    tiebreaker. Instead of OFFSET the page starts right after the ordering
+    values of the last record of the previous page, so deep pages are as
+    fast as the first one. No count query is made and the response
+    contains only next, previous and results.
+
+    Ordering fields must be non-nullable attributes of the records, which
+    are model fields or annotations of the queryset. Cursor values are
+    converted by their fields, so a tampered cursor is rejected as invalid.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+    keyset_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            self.keyset_only or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        results = list(queryset[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.results = results
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ('next', self.get_next_link()),
+                    ('previous', self.get_previous_link()),
+                    ('results', data),
+                ]
+            )
+        )
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(self.results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.results:
+            return None
+        return self.encode_cursor(self.results[0], reverse=True)
+
+    def get_ordering(self, queryset):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', queryset.model._meta.pk.name}:
+            ordering.append('pk')
+        return ordering
+
+    def decode_cursor(self, request, queryset):
+        """Return (position, reverse) tuple encoded in the cursor."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (
+            binascii.Error,
+            json.JSONDecodeError,
+            KeyError,
+            TypeError,
+            UnicodeDecodeError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(
+            self.ordering
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                self._to_python(queryset, field.lstrip('-'), value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        position = [
+            self._get_value(instance, field.lstrip('-'))
+            for field in self.ordering
+        ]
+        cursor = json.dumps({'p': position, 'r': reverse})
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _to_python(queryset, name, value):
+        """Return the cursor value converted by the ordering field."""
+        if value is None or isinstance(value, (dict, list)):
+            raise TypeError(name)
+        if name in queryset.query.annotations:
+            field = queryset.query.annotations[name].output_field
+        elif name == 'pk':
+            field = queryset.model._meta.pk
+        else:
+            field = queryset.model._meta.get_field(name)
+        return field.to_python(value)
+
+    @staticmethod
+    def _get_value(instance, name):
+        value = getattr(instance, name)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(ordering, position):
+        """Build condition selecting records that follow the position."""
+        conditions = []
+        for index, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = {
+                previous.lstrip('-'): value
+                for previous, value in zip(ordering[:index], position)
+            }
+            condition[f'{field.lstrip("-")}__{lookup}'] = position[index]
+            conditions.append(Q(**condition))
+        return reduce(operator.or_, conditions)
+
+
+class KeysetOnlyDynamicLimitPaginator(KeysetDynamicLimitPaginator):
+    """Keyset paginator, whose first page is requested without cursor."""
+
+    keyset_only = True
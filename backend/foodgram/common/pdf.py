@@ -0,0 +1,194 @@
+import logging
+import os
+import time
+from functools import partial
+
+from django.conf import settings
+from weasyprint import HTML
+from weasyprint.text.fonts import FontConfiguration
+
+from common.workers import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+_font_config = None
+
+
+def _warm_up():
+    """
+    Prepare worker process for rendering.
+
+    Font configuration is created once per process and a tiny document is
+    rendered, so the first real job doesn't pay for loading WeasyPrint,
+    Pango and fonts.
+    """
+    global _font_config
+    _font_config = FontConfiguration()
+    render_pdf('<p></p>')
+
+
+def render_pdf(html_string):
+    return HTML(string=html_string).write_pdf(font_config=_font_config)
+
+
+def _write(path, content):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
+
+def _render_to_file(html_string, path):
+    _write(path, render_pdf(html_string))
+
+
+_pool = WorkerPool(lambda: settings.PDF_RENDER_WORKERS, _warm_up)
+
+
+def is_async_enabled(size):
+    """
+    Tell if a document of the size (number of list items) is rendered by
+    the worker pool. Small documents are rendered within the request.
+    """
+    return (
+        settings.PDF_RENDER_WORKERS > 0
+        and size > settings.PDF_SYNC_RENDER_MAX_ITEMS
+    )
+
+
+def _get_cache_path(digest):
+    return os.path.join(settings.PDF_CACHE_DIR, f'{digest}.pdf')
+
+
+def open_cached(digest):
+    """
+    Return opened cached PDF file with the digest or None if it's missing.
+
+    Modification time of the file is updated on every use, so the least
+    recently used files are evicted first.
+    """
+    path = _get_cache_path(digest)
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return file
+
+
+def store(digest, pdf):
+    """Put rendered PDF into the cache."""
+    os.makedirs(settings.PDF_CACHE_DIR, exist_ok=True)
+    _write(_get_cache_path(digest), pdf)
+    _evict()
+
+
+def _evict():
+    """Remove least recently used files until the cache fits its size."""
+    files = []
+    for entry in os.scandir(settings.PDF_CACHE_DIR):
+        if not entry.name.endswith('.pdf'):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+    size = sum(file_size for _, file_size, _ in files)
+    files.sort()
+    for _, file_size, path in files:
+        if size <= settings.PDF_CACHE_MAX_SIZE:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        size -= file_size
+
+
+def _get_job_path(owner, digest, state):
+    directory = os.path.join(settings.PDF_RENDER_JOBS_DIR, str(owner))
+    return os.path.join(directory, f'{digest}.{state}')
+
+
+def _touch(path):
+    with open(path, 'w'):
+        pass
+
+
+def _finish(failed_path, future):
+    exception = future.exception()
+    if exception is None:
+        _evict()
+        return
+    logger.error('PDF rendering failed', exc_info=exception)
+    _touch(failed_path)
+
+
+def _remove_expired_jobs():
+    expired = time.time() - settings.PDF_RENDER_JOB_TTL
+    if not os.path.isdir(settings.PDF_RENDER_JOBS_DIR):
+        return
+    for directory in os.scandir(settings.PDF_RENDER_JOBS_DIR):
+        if not directory.is_dir():
+            continue
+        for entry in os.scandir(directory.path):
+            try:
+                if entry.stat().st_mtime < expired:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def submit_job(html_string, owner, digest):
+    """
+    Queue rendering of the HTML into cached PDF file with the digest.
+
+    The digest is also id of the job. Job state is kept in files of the
+    owner's directory, so it can be checked by any web worker process of
+    the host. A job already running for the owner is not queued again.
+    """
+    state, file = get_job(owner, digest)
+    if file is not None:
+        file.close()
+    if state == PENDING:
+        return
+    _remove_expired_jobs()
+    pending_path = _get_job_path(owner, digest, PENDING)
+    failed_path = _get_job_path(owner, digest, FAILED)
+    os.makedirs(os.path.dirname(pending_path), exist_ok=True)
+    os.makedirs(settings.PDF_CACHE_DIR, exist_ok=True)
+    if os.path.exists(failed_path):
+        os.remove(failed_path)
+    _touch(pending_path)
+    future = _pool.submit(
+        _render_to_file, html_string, _get_cache_path(digest)
+    )
+    future.add_done_callback(partial(_finish, failed_path))
+
+
+def get_job(owner, digest):
+    """
+    Return (state, file) of the owner's job or (None, None) if there is no
+    such job. File is opened only for ready jobs.
+    """
+    pending_path = _get_job_path(owner, digest, PENDING)
+    try:
+        started = os.path.getmtime(pending_path)
+    except FileNotFoundError:
+        return None, None
+    file = open_cached(digest)
+    if file is not None:
+        return READY, file
+    if os.path.exists(_get_job_path(owner, digest, FAILED)):
+        return FAILED, None
+    if time.time() - started > settings.PDF_RENDER_JOB_TIMEOUT:
+        return FAILED, None
+    return PENDING, None
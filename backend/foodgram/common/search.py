@@ -0,0 +1,167 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection, transaction
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    When,
+)
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from common.signals import recipes_created
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+SEARCH_CONFIGS = ('russian', 'english')
+
+
+def build_search_vector(ingredient_recipe_model=IngredientRecipe):
+    """
+    Build search vector expression for recipes.
+
+    Recipe name has the highest weight, then go ingredient names and then
+    recipe text. Each of them is parsed with all SEARCH_CONFIGS.
+    """
+    ingredients = Subquery(
+        ingredient_recipe_model.objects.filter(recipe=OuterRef('pk'))
+        .order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('ingredient__name', ' '))
+        .values('names')
+    )
+    vector = None
+    for config in SEARCH_CONFIGS:
+        config_vector = (
+            SearchVector('name', weight='A', config=config)
+            + SearchVector(ingredients, weight='B', config=config)
+            + SearchVector('text', weight='C', config=config)
+        )
+        vector = config_vector if vector is None else vector + config_vector
+    return vector
+
+
+def is_search_vector_supported():
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vector(recipe_ids):
+    if is_search_vector_supported():
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=build_search_vector()
+        )
+
+
+def schedule_search_vector_update(recipe_ids):
+    """Update search vector of recipes once the transaction commits."""
+    if is_search_vector_supported():
+        recipe_ids = list(recipe_ids)
+        transaction.on_commit(lambda: update_search_vector(recipe_ids))
+
+
+def _on_recipe_change(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # updated by recipes_created
+        return
+    schedule_search_vector_update((instance.pk,))
+
+
+def _on_recipes_created(sender, recipes, **kwargs):
+    schedule_search_vector_update(recipe.pk for recipe in recipes)
+
+
+def _on_ingredient_recipe_change(sender, instance, **kwargs):
+    schedule_search_vector_update((instance.recipe_id,))
+
+
+def _on_ingredients_change(sender, instance, action, pk_set, **kwargs):
+    if action.startswith('pre_'):
+        return
+    if isinstance(instance, Recipe):
+        schedule_search_vector_update((instance.pk,))
+    else:
+        schedule_search_vector_update(pk_set or ())
+
+
+def _on_ingredient_change(sender, instance, created, **kwargs):
+    if not created:
+        schedule_search_vector_update(
+            instance.ingredient_recipes.values_list('recipe_id', flat=True)
+        )
+
+
+def connect_search_vector():
+    """Keep search vector of recipes in sync with recipe data."""
+    post_save.connect(
+        _on_recipe_change, sender=Recipe, dispatch_uid='search.recipe'
+    )
+    recipes_created.connect(
+        _on_recipes_created, sender=Recipe, dispatch_uid='search.created'
+    )
+    post_save.connect(
+        _on_ingredient_recipe_change,
+        sender=IngredientRecipe,
+        dispatch_uid='search.ingredient_recipe',
+    )
+    post_delete.connect(
+        _on_ingredient_recipe_change,
+        sender=IngredientRecipe,
+        dispatch_uid='search.ingredient_recipe',
+    )
+    m2m_changed.connect(
+        _on_ingredients_change,
+        sender=Recipe.ingredients.through,
+        dispatch_uid='search.ingredients',
+    )
+    post_save.connect(
+        _on_ingredient_change,
+        sender=Ingredient,
+        dispatch_uid='search.ingredient',
+    )
+
+
+def search_recipes(queryset, value):
+    """
+    Filter recipes by search query and order them by rank.
+
+    PostgreSQL searches the search vector with GIN index. Other databases
+    fall back to case-insensitive substring search where matches in
+    the name rank higher than matches in ingredients and the text.
+    """
+    if is_search_vector_supported():
+        query = None
+        for config in SEARCH_CONFIGS:
+            config_query = SearchQuery(
+                value, config=config, search_type='websearch'
+            )
+            query = config_query if query is None else query | config_query
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by('-search_rank', *Recipe._meta.ordering)
+        )
+
+    in_ingredients = Exists(
+        IngredientRecipe.objects.filter(
+            recipe=OuterRef('pk'), ingredient__name__icontains=value
+        )
+    )
+    rank = Case(
+        When(name__icontains=value, then=3),
+        When(in_ingredients, then=2),
+        When(text__icontains=value, then=1),
+        default=0,
+        output_field=IntegerField(),
+    )
+    return (
+        queryset.annotate(search_rank=rank)
+        .filter(~Q(search_rank=0))
+        .order_by('-search_rank', *Recipe._meta.ordering)
+    )
@@ -1,10 +1,32 @@
 from rest_framework import serializers
 
+from common.images import get_variant_urls
 from recipes.models import Recipe
 
 
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of variants of the image by variant and format."""
+
+    def to_representation(self, image):
+        if not image:
+            return None
+        urls = get_variant_urls(image.name)
+        request = self.context.get('request')
+        if request is None:
+            return urls
+        return {
+            variant: {
+                file_format: request.build_absolute_uri(url)
+                for file_format, url in formats.items()
+            }
+            for variant, formats in urls.items()
+        }
+
+
 class SimpleRecipeSerializer(serializers.ModelSerializer):
+    images = ImageVariantsField(source='image')
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'images', 'cooking_time')
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
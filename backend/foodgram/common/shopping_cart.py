@@ -0,0 +1,156 @@
+import csv
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from common.utils import (
+    Echo,
+    build_ingredient_entry,
+    build_ingredients_summary,
+    get_cart_ingredients,
+)
+from recipes.models import InCartRecipe, Ingredient, IngredientRecipe, Recipe
+
+SHOPPING_CART_VERSION_KEY = 'shopping-cart-version'
+SHOPPING_CART_MODELS = (Recipe, IngredientRecipe, Ingredient)
+
+
+def _cache_key(user_id):
+    version = cache.get_or_set(SHOPPING_CART_VERSION_KEY, time.time_ns, None)
+    return f'shopping-cart-digest:{version}:{user_id}'
+
+
+def get_cart_recipes(user):
+    """Return names of recipes in the user's cart."""
+    return list(user.cart_recipes.values_list('recipe__name', flat=True))
+
+
+def iter_cart_ingredients(user):
+    """
+    Return iterator over shopping list entries of the user's cart, which
+    reads aggregated ingredients from the database in chunks.
+    """
+    return map(build_ingredient_entry, get_cart_ingredients(user).iterator())
+
+
+def get_shopping_cart(user):
+    """
+    Return context of the shopping list document for the user's cart or
+    None if the cart is empty.
+    """
+    recipes = get_cart_recipes(user)
+    if not recipes:
+        return None
+    return {
+        'recipes': recipes,
+        'ingredients': build_ingredients_summary(get_cart_ingredients(user)),
+    }
+
+
+def build_digest(context):
+    """
+    Return SHA-256 digest of the shopping list, which identifies documents
+    rendered from it. Identical carts of different users have equal digest.
+    """
+    content = json.dumps(context, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def get_digest(user):
+    """Return cached digest of the user's shopping list if any."""
+    return cache.get(_cache_key(user.pk))
+
+
+def set_digest(user, digest):
+    cache.set(
+        _cache_key(user.pk), digest, settings.SHOPPING_CART_DIGEST_TIMEOUT
+    )
+
+
+def stream_text(recipes, ingredients):
+    yield 'Рецепты в корзине:\n'
+    for recipe in recipes:
+        yield f'- {recipe}\n'
+    yield '\nСписок продуктов для покупки:\n'
+    for ingredient in ingredients:
+        yield (
+            f'- {ingredient["name"]}: {ingredient["amount"]} '
+            f'{ingredient["measurement_unit"]}\n'
+        )
+
+
+def stream_csv(recipes, ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for ingredient in ingredients:
+        yield writer.writerow(
+            (
+                ingredient['name'],
+                ingredient['amount'],
+                ingredient['measurement_unit'],
+            )
+        )
+
+
+def stream_json(recipes, ingredients):
+    yield '{"recipes": '
+    yield json.dumps(recipes, ensure_ascii=False)
+    yield ', "ingredients": ['
+    for index, ingredient in enumerate(ingredients):
+        if index:
+            yield ', '
+        yield json.dumps(ingredient, ensure_ascii=False)
+    yield ']}'
+
+
+# Formats of shopping list produced without rendering a document, mapped
+# to (generator, content type)
+STREAM_FORMATS = {
+    'txt': (stream_text, 'text/plain; charset=utf-8'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'json': (stream_json, 'application/json'),
+}
+
+
+def _invalidate_user(sender, instance, **kwargs):
+    key = _cache_key(instance.user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def bump_shopping_cart_version():
+    """Drop cached digests of shopping lists of all users."""
+    cache.set(SHOPPING_CART_VERSION_KEY, time.time_ns(), None)
+
+
+def _invalidate_all(sender, action='post', **kwargs):
+    if action.startswith('pre_'):
+        return
+    transaction.on_commit(bump_shopping_cart_version)
+
+
+def connect_shopping_cart():
+    """
+    Drop cached digests of shopping lists when carts, recipes or their
+    ingredients change.
+    """
+    uid = 'shopping-cart.incartrecipe'
+    post_save.connect(_invalidate_user, sender=InCartRecipe, dispatch_uid=uid)
+    post_delete.connect(
+        _invalidate_user, sender=InCartRecipe, dispatch_uid=uid
+    )
+    for model in SHOPPING_CART_MODELS:
+        uid = f'shopping-cart.{model._meta.model_name}'
+        post_save.connect(_invalidate_all, sender=model, dispatch_uid=uid)
+        post_delete.connect(_invalidate_all, sender=model, dispatch_uid=uid)
+    through_model = Recipe.ingredients.through
+    m2m_changed.connect(
+        _invalidate_all,
+        sender=through_model,
+        dispatch_uid=f'shopping-cart.m2m.{through_model._meta.model_name}',
+    )
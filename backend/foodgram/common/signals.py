@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save
+from django.dispatch import Signal
+
+from recipes.models import Recipe
+
+# Sent with the list of created recipes as recipes argument. Recipes
+# created by save() send it from post_save, bulk inserts don't send
+# post_save, so they send it themselves.
+recipes_created = Signal()
+
+
+def send_recipes_created(recipes):
+    recipes_created.send(sender=Recipe, recipes=list(recipes))
+
+
+def _on_recipe_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        send_recipes_created((instance,))
+
+
+def connect_recipes_created():
+    """Send recipes_created when a recipe is created by save()."""
+    post_save.connect(
+        _on_recipe_save, sender=Recipe, dispatch_uid='recipes-created'
+    )
@@ -0,0 +1,50 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    File system storage naming files by SHA-256 digest of their content.
+
+    Only directory and extension of the given name are kept, so saving the
+    same content again returns name of the stored file instead of writing
+    a copy. Content of a name never changes, stored files may be shared by
+    many records and are removed only by the cleanmedia command.
+
+    Content is written to a temporary file which is then linked to the
+    hashed name. Linking fails if the name exists, so concurrent saves of
+    the same content share one complete file and are never renamed.
+    """
+
+    def get_hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, f'{digest.hexdigest()}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return self._save(name, content)
+
+    def _save(self, name, content):
+        tmp_name = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        tmp_path = self.path(tmp_name)
+        try:
+            os.link(tmp_path, self.path(name))
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+        return name
@@ -0,0 +1,32 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+MAX_SIZE_MESSAGE = _('Ensure the image size is at most {max_size} bytes.')
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream uploaded files to temporary files on disk, whatever their size.
+
+    Upload is stopped as soon as a file exceeds max_size, the rest of the
+    file is neither read nor stored.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.max_size is not None and (
+            start + len(raw_data) > self.max_size
+        ):
+            self.file.close()
+            raise ValidationError(
+                {
+                    self.field_name: [
+                        MAX_SIZE_MESSAGE.format(max_size=self.max_size)
+                    ]
+                }
+            )
+        return super().receive_data_chunk(raw_data, start)
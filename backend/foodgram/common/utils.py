@@ -1,10 +1,15 @@
-from collections import defaultdict
-
+from django.db import transaction
+from django.db.models import F, Sum, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 
+from recipes.models import IngredientRecipe, Recipe
+
 
+@transaction.atomic
 def follow(
     viewset, request, pk, target_model, target_field: str, through_model
 ):
@@ -18,6 +23,7 @@ def follow(
     return Response(serializer.data)
 
 
+@transaction.atomic
 def unfollow(request, pk, target_field: str, through_model):
     record = {
         target_field + '__id': pk,
@@ -28,32 +34,83 @@ def unfollow(request, pk, target_field: str, through_model):
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-def build_ingredients_summary(recipes_ingredients):
+def get_ranked_ids(queryset, partition_by, order_by, lookup, rank):
     """
-    Collect ingredients from all recipes and calculate total amount for each.
-
-    While collecting the same ingredients, (name, measurement_unit) is used
-    as a key because the same ingredient for different recipe can have
-    different measurement unit and we can't add them. The algorithm simply
-    distinguish such ingredients. It doesn't try to convert different units
-    because we don't know all possible units.
+    Return SQL selecting ids of the queryset records numbered within their
+    partition by ROW_NUMBER() window function whose number satisfies the
+    lookup (SQL comparison operator) with the rank.
 
-    Return list of ingredients.
+    The numbered query is wrapped into a derived table, since window
+    functions can't be filtered directly.
     """
-    summary = defaultdict(int)
-    for ingredients in recipes_ingredients:
-        for ingredient in ingredients:
-            key = (ingredient['name'], ingredient['measurement_unit'])
-            summary[key] += ingredient['amount']
+    ranked = (
+        queryset.annotate(
+            row_rank=Window(
+                RowNumber(), partition_by=partition_by, order_by=order_by
+            )
+        )
+        .order_by()
+        .values('pk', 'row_rank')
+    )
+    sql, params = ranked.query.sql_with_params()
+    return RawSQL(
+        f'SELECT id FROM ({sql}) ranked WHERE row_rank {lookup} %s',
+        (*params, rank),
+    )
+
 
-    results = []
-    for ingredient, amount in summary.items():
-        name, measurement_unit = ingredient
-        results.append(
-            {
-                'name': name,
-                'amount': amount,
-                'measurement_unit': measurement_unit,
-            }
+def get_latest_recipes(author_ids, limit):
+    """
+    Return queryset of at most limit latest recipes of each author, which
+    are selected by a single query in the default recipe ordering.
+    """
+    return Recipe.objects.filter(
+        pk__in=get_ranked_ids(
+            Recipe.objects.filter(author__in=author_ids),
+            F('author'),
+            (F('created').desc(), F('name').asc(), F('pk').asc()),
+            '<=',
+            limit,
         )
-    return results
+    )
+
+
+def get_cart_ingredients(user):
+    """
+    Return total amount of each ingredient of recipes in the user's cart.
+
+    Amounts are summed by the database in a single query grouped by
+    ingredient name and measurement unit, so the same ingredient measured
+    in different units is listed separately.
+    """
+    return (
+        IngredientRecipe.objects.filter(recipe__incartrecipe__user=user)
+        .values('ingredient__name', 'ingredient__measurement_unit')
+        .annotate(amount=Sum('amount'))
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
+    )
+
+
+def build_ingredient_entry(total):
+    """Convert aggregated ingredient total into shopping list entry."""
+    return {
+        'name': total['ingredient__name'],
+        'amount': total['amount'],
+        'measurement_unit': total['ingredient__measurement_unit'],
+    }
+
+
+def build_ingredients_summary(ingredient_totals):
+    """
+    Convert aggregated ingredient totals into shopping list entries.
+
+    Return list of ingredients with name, amount and measurement_unit keys.
+    """
+    return [build_ingredient_entry(total) for total in ingredient_totals]
+
+
+class Echo:
+    """File-like object returning written value instead of storing it."""
+
+    def write(self, value):
+        return value
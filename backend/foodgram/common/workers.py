@@ -0,0 +1,37 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+
+class WorkerPool:
+    """
+    Pool of spawned worker processes, started on the first submitted call
+    and restarted if it's broken, e.g. a worker was killed.
+
+    Functions called by workers may use Django models only if the pool's
+    initializer is django.setup, otherwise workers don't set up Django.
+    """
+
+    def __init__(self, get_max_workers, initializer=None):
+        self._get_max_workers = get_max_workers
+        self._initializer = initializer
+        self._executor = None
+        self._lock = Lock()
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self._get_max_workers(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=self._initializer,
+        )
+
+    def submit(self, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            try:
+                return self._executor.submit(*args)
+            except BrokenProcessPool:
+                self._executor = self._create_executor()
+                return self._executor.submit(*args)
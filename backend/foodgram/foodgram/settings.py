@@ -91,6 +91,112 @@ DATABASES = {
 }
 
 
+# Cache
+# The cache must be shared by all workers, otherwise invalidation only
+# reaches the current worker. The default database cache needs no extra
+# service, its table is created by createcachetable command on deploy.
+# Redis or Memcached can be set through the env variables instead, a
+# per-process cache (LocMemCache) is only suitable for a single worker.
+# Backends that store entries themselves remove 1/CULL_FREQUENCY of them
+# once there are more than MAX_ENTRIES, content and membership versions
+# are kept only while culling doesn't reach them, so the limit is well
+# above the expected number of entries.
+
+CACHE_BACKEND = os.getenv(
+    'DJANGO_CACHE_BACKEND',
+    default='django.core.cache.backends.db.DatabaseCache',
+)
+CULLING_CACHE_BACKENDS = (
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', default='django_cache'),
+    }
+}
+if CACHE_BACKEND in CULLING_CACHE_BACKENDS:
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(
+            os.getenv('DJANGO_CACHE_MAX_ENTRIES', default=100_000)
+        ),
+        'CULL_FREQUENCY': 10,
+    }
+
+# Seconds to keep ids of user's favorite and in cart recipes
+RECIPE_MEMBERSHIP_CACHE_TIMEOUT = 60 * 10
+
+# Seconds to serve cached recipe responses to anonymous users and seconds
+# to serve them stale while one of the requests refreshes them
+RESPONSE_CACHE_TIMEOUT = 60
+RESPONSE_CACHE_STALE_TIMEOUT = 60 * 5
+
+# Seconds between checks if tags and ingredients catalogs have changed
+CATALOG_CHECK_INTERVAL = 5
+
+# Number of processes rendering PDF documents in background (0 renders
+# every document within the request), maximum number of list items of a
+# document rendered within the request, directory for rendering jobs,
+# seconds to wait for a job to finish and seconds to keep finished jobs
+PDF_RENDER_WORKERS = int(os.getenv('DJANGO_PDF_RENDER_WORKERS', default=1))
+PDF_SYNC_RENDER_MAX_ITEMS = 50
+PDF_RENDER_JOBS_DIR = os.getenv(
+    'DJANGO_PDF_RENDER_JOBS_DIR', default=os.path.join(BASE_DIR, 'pdf_jobs')
+)
+PDF_RENDER_JOB_TIMEOUT = 60
+PDF_RENDER_JOB_TTL = 60 * 60
+
+# Directory and maximum size in bytes of rendered PDF documents cache and
+# seconds to remember which document matches user's shopping cart
+PDF_CACHE_DIR = os.getenv(
+    'DJANGO_PDF_CACHE_DIR', default=os.path.join(BASE_DIR, 'pdf_cache')
+)
+PDF_CACHE_MAX_SIZE = int(
+    os.getenv('DJANGO_PDF_CACHE_MAX_SIZE', default=100 * 1024 * 1024)
+)
+SHOPPING_CART_DIGEST_TIMEOUT = 60 * 60 * 24
+
+# Maximum number of recipes created by one bulk request and number of
+# recipes inserted by one query
+RECIPE_BULK_CREATE_MAX_ITEMS = 500
+RECIPE_BULK_CREATE_BATCH_SIZE = 100
+
+# Maximum number of recipes of each author in subscriptions, also used
+# when recipes_limit query parameter is missing
+SUBSCRIPTION_RECIPES_LIMIT = 100
+
+# Maximum number of recipes kept in the feed of each user, number of users
+# whose feeds are written by one query and number of processes adding new
+# recipes to feeds in background (0 adds them once the request commits)
+FEED_MAX_ENTRIES = 500
+FEED_BATCH_SIZE = 1000
+FEED_FANOUT_WORKERS = int(os.getenv('DJANGO_FEED_FANOUT_WORKERS', default=1))
+
+# Maximum size in bytes and maximum width and height in pixels of uploaded
+# recipe images
+RECIPE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_DIMENSION = 6000
+
+# Maximum width and height of recipe image variants, directory of variant
+# files within MEDIA_ROOT and number of processes generating variants in
+# background (0 generates every variant on its first request)
+IMAGE_VARIANT_SIZES = {
+    'thumbnail': (150, 150),
+    'card': (600, 600),
+    'full': (1600, 1600),
+}
+IMAGE_VARIANTS_DIR = 'variants'
+IMAGE_VARIANT_WORKERS = int(
+    os.getenv('DJANGO_IMAGE_VARIANT_WORKERS', default=1)
+)
+
+# Number of recipes fetched from the database at once by recipes export
+EXPORT_CHUNK_SIZE = 1000
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
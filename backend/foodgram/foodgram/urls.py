@@ -3,9 +3,16 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from api.views import image_variant
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path(
+        f'media/{settings.IMAGE_VARIANTS_DIR}/<path:path>',
+        image_variant,
+        name='image-variant',
+    ),
 ]
 
 if settings.DEBUG:
@@ -57,6 +57,8 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         'name',
         'author',
+        'favorites_count',
+        'cart_count',
     )
     readonly_fields = ('favorites',)
     list_filter = ('tags__slug',)
@@ -64,4 +66,4 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @admin.display(description=_('times marked as favorite'))
     def favorites(self, obj):
-        return obj.favorited_by.count()
+        return obj.favorites_count
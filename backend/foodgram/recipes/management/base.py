@@ -1,11 +1,29 @@
 import csv
+import io
+import json
+import multiprocessing
 import os
 import re
+from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
 
+import django
 from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.management.base import BaseCommand, CommandError
-from django.db import DatabaseError
-from django.db.models import ForeignKey
+from django.db import DatabaseError, connection, transaction
+from django.db.models import ForeignKey, UniqueConstraint
+
+from common.cache import bump_content_version
+
+FILE_FORMATS = ('csv', 'json')
 
 
 class ImportDataExceptionError(Exception):
@@ -15,91 +33,401 @@ class ImportDataExceptionError(Exception):
 
 
 class ImportDataBaseCommand(BaseCommand):
-    help = 'Import csv data into db via Django ORM'
+    help = 'Import csv or json data into db via Django ORM'
     models = ()
+    json_chunk_size = 64 * 1024
 
     _camel_2_snake_case = re.compile(r'(?<!^)(?=[A-Z])')
 
-    def _get_filename_by_model_name(self, model_name) -> str:
-        """Convert model name into a filename."""
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of records written by one query',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FILE_FORMATS,
+            default='csv',
+            help='Preferred format of data files. A file of the other '
+            'format is used if there is no file of the preferred one',
+        )
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Update records which are already in db instead of '
+            'skipping them',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of models imported at the same time and number of '
+            'processes hashing passwords. Models are imported one by one '
+            'in SQLite',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Write records with INSERT instead of COPY in PostgreSQL',
+        )
+
+    def _get_filename_by_model_name(self, model_name, file_format) -> str:
+        """
+        Convert model name into a filename.
+
+        File of the preferred format is returned if it exists, otherwise
+        file of any other supported format.
+        """
         snake_case_name = self._camel_2_snake_case.sub('_', model_name).lower()
-        return os.path.join(settings.TEST_DATA_DIR, f'{snake_case_name}.csv')
+        formats = sorted(FILE_FORMATS, key=lambda name: name != file_format)
+        filenames = [
+            os.path.join(settings.TEST_DATA_DIR, f'{snake_case_name}.{name}')
+            for name in formats
+        ]
+        for filename in filenames:
+            if os.path.exists(filename):
+                return filename
+        return filenames[0]
 
-    def _get_foreign_key_model(self, model, fieldname):
-        """Return None if not foreignkey, otherwise the relevant model."""
-        field_object = model._meta.get_field(fieldname)
-        if isinstance(field_object, ForeignKey):
-            return field_object.remote_field.model
-        return None
+    def _read_csv(self, file):
+        yield from csv.DictReader(file)
+
+    def _read_json(self, file):
+        """
+        Yield objects of JSON array from the file.
+
+        The file is read in chunks, so the whole array is never in memory.
+        """
+        decoder = json.JSONDecoder()
+        buffer, position = '', 0
+        while True:
+            chunk = file.read(self.json_chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            while True:
+                while position < len(buffer) and (
+                    buffer[position].isspace() or buffer[position] in '[,]'
+                ):
+                    position += 1
+                if position == len(buffer):
+                    break
+                try:
+                    record, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break
+                if not isinstance(record, dict):
+                    raise json.JSONDecodeError(
+                        'Expected object', buffer, position
+                    )
+                yield record
+            if not chunk:
+                return
+
+    def _get_foreign_keys(self, model, columns):
+        """
+        Return {column: (attname, related model)} for foreign key columns.
+
+        Column can be named either as the field (author) or as its
+        attribute (author_id), the value is primary key in both cases.
+        """
+        foreign_keys = {}
+        for column in columns:
+            try:
+                field = model._meta.get_field(column)
+            except FieldDoesNotExist:
+                continue
+            if isinstance(field, ForeignKey):
+                foreign_keys[column] = (
+                    field.attname,
+                    field.remote_field.model,
+                )
+        return foreign_keys
+
+    def _resolve_foreign_keys(self, batch, foreign_keys):
+        """
+        Check that records referenced by the batch exist.
 
-    def _build_db_record(self, model, row):
+        Known primary keys are kept per model, so only keys which were not
+        seen before are queried, once per batch.
+        """
+        for column, (_, related_model) in foreign_keys.items():
+            pk_field = related_model._meta.pk
+            known = self._known_ids[related_model]
+            values = set()
+            for row in batch:
+                if row[column] not in ('', None):
+                    row[column] = pk_field.to_python(row[column])
+                    values.add(row[column])
+                else:
+                    row[column] = None
+            missing = values - known
+            if not missing:
+                continue
+            known.update(
+                related_model.objects.filter(pk__in=missing).values_list(
+                    'pk', flat=True
+                )
+            )
+            missing -= known
+            if missing:
+                raise ImportDataExceptionError(
+                    f'Не найдены записи модели {related_model.__name__} '
+                    f'с id {", ".join(map(str, sorted(missing)))}.'
+                )
+
+    def _build_db_record(self, model, row, foreign_keys):
         """Take row of data that corresponds to model table record data.
 
         Convert it to record that can be passed to created record
         in a db table.
 
-        row is an OrderedDict where key is a model field and value is a
-        field value.
-
-        The method checks if field is a ForeignKey field and if it is,
-        it gets related object from db and assigns it as a value to the
-        field. Exception is when field name ends with '_id', meaning that
-        object id can be used to create record.
-        If the field contains any other than ForeignKey field, it simply
-        assigns the value.
+        row is a dict where key is a model field and value is a field
+        value. Foreign key values are primary keys of related records,
+        they are assigned to id attributes of the fields (author_id), so
+        related objects are not fetched.
 
         returns record which is a dict with fieldname and its value
         """
         record = {}
         for key, value in row.items():
-            related_object = self._get_foreign_key_model(model, key)
-            if related_object and not key.endswith('_id'):
-                obj_instance = related_object.objects.get(pk=value)
-                record[key] = obj_instance
+            if key in foreign_keys:
+                record[foreign_keys[key][0]] = value
             else:
                 record[key] = value
         return record
 
-    def _import_data(self, model, filename, verbosity) -> int:
+    def _hash_passwords(self, records):
+        """
+        Replace raw passwords of user records with hashes.
+
+        Hashing is slow by design, so it's done by a pool of processes.
+        """
+        passwords = [record['password'] or None for record in records]
+        if self._hashing_pool is None:
+            hashes = map(make_password, passwords)
+        else:
+            chunksize = max(1, len(passwords) // self._hashing_workers)
+            hashes = self._hashing_pool.map(
+                make_password, passwords, chunksize=chunksize
+            )
+        for record, password_hash in zip(records, hashes):
+            record['password'] = password_hash
+
+    def _get_unique_fields(self, model, columns):
+        """
+        Return names of fields identifying a record, which are all among
+        columns, or None if records can't be identified.
+        """
+        meta = model._meta
+        candidates = [(meta.pk.name,)]
+        candidates.extend(
+            (field.name,)
+            for field in meta.concrete_fields
+            if field.unique and not field.primary_key
+        )
+        candidates.extend(
+            tuple(constraint.fields)
+            for constraint in meta.constraints
+            if isinstance(constraint, UniqueConstraint)
+            and constraint.fields
+            and constraint.condition is None
+        )
+        candidates.extend(tuple(fields) for fields in meta.unique_together)
+        for fields in candidates:
+            if set(fields) <= columns:
+                return list(fields)
+        return None
+
+    def _get_update_fields(self, model, columns, unique_fields):
+        """Return fields set from columns and fields set on every save."""
+        update_fields = []
+        for field in model._meta.concrete_fields:
+            if field.primary_key or field.name in unique_fields:
+                continue
+            if (
+                field.name in columns
+                or field.attname in columns
+                or getattr(field, 'auto_now', False)
+            ):
+                update_fields.append(field.name)
+        return update_fields
+
+    def _write_batch(self, model, records, options, unique_fields):
+        objs = [model(**record) for record in records]
+        update_fields = []
+        if options['update']:
+            update_fields = self._get_update_fields(
+                model, set(records[0]), unique_fields
+            )
+        if connection.vendor == 'postgresql' and not options['no_copy']:
+            self._copy_batch(model, objs, set(records[0]), update_fields)
+            return
+        conflict_options = {'ignore_conflicts': True}
+        if options['update']:
+            conflict_options = {
+                'update_conflicts': True,
+                'unique_fields': unique_fields,
+                'update_fields': update_fields,
+            }
+        with transaction.atomic():
+            model.objects.bulk_create(
+                objs, batch_size=options['batch_size'], **conflict_options
+            )
+
+    @staticmethod
+    def _format_copy_value(value):
+        """Format value for COPY in CSV format, None is NULL."""
+        if value is None:
+            return ''
+        return '"' + str(value).replace('"', '""') + '"'
+
+    def _copy_batch(self, model, objs, columns, update_fields):
         """
-        Parse csv data from filename and creates db records for models.
+        Write records to PostgreSQL table through a staging table.
 
-        Returns number of records imported.
+        Records are streamed with COPY FROM STDIN into a temporary table,
+        which is merged into the model table with INSERT ... ON CONFLICT.
+        Records which are already in the table are skipped or updated if
+        update_fields are given. Unique fields of the update are taken
+        from _get_unique_fields.
         """
+        quote_name = connection.ops.quote_name
+        meta = model._meta
+        fields = [
+            field
+            for field in meta.concrete_fields
+            if not field.primary_key
+            or {field.name, field.attname} & columns
+        ]
+        data = io.StringIO()
+        for obj in objs:
+            data.write(
+                ','.join(
+                    self._format_copy_value(
+                        field.get_db_prep_save(
+                            field.pre_save(obj, add=True), connection
+                        )
+                    )
+                    for field in fields
+                )
+            )
+            data.write('\n')
+        data.seek(0)
+
+        table = quote_name(meta.db_table)
+        staging = quote_name(f'{meta.db_table}_import')
+        column_list = ', '.join(quote_name(field.column) for field in fields)
+        select = f'SELECT {column_list} FROM {staging}'
+        conflict = 'ON CONFLICT DO NOTHING'
+        if update_fields:
+            unique_fields = self._get_unique_fields(model, columns)
+            unique_list = ', '.join(
+                quote_name(meta.get_field(name).column)
+                for name in unique_fields
+            )
+            # the same record can't be updated twice by a single INSERT
+            select = (
+                f'SELECT DISTINCT ON ({unique_list}) {column_list} '
+                f'FROM {staging}'
+            )
+            updates = ', '.join(
+                f'{quote_name(column)} = EXCLUDED.{quote_name(column)}'
+                for column in (
+                    meta.get_field(name).column for name in update_fields
+                )
+            )
+            conflict = f'ON CONFLICT ({unique_list}) DO UPDATE SET {updates}'
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS '
+                f'SELECT {column_list} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(
+                f'COPY {staging} ({column_list}) FROM STDIN '
+                f'WITH (FORMAT csv)',
+                data,
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({column_list}) {select} {conflict}'
+            )
+
+    def _import_batch(self, model, batch, filename, options):
+        columns = set(batch[0])
+        foreign_keys = self._get_foreign_keys(model, columns)
+        unique_fields = self._get_unique_fields(model, columns)
+        if options['update'] and unique_fields is None:
+            raise ImportDataExceptionError(
+                f'В файле {filename} нет полей, по которым можно найти '
+                f'записи модели {model.__name__} для обновления.'
+            )
+        self._resolve_foreign_keys(batch, foreign_keys)
+        records = [
+            self._build_db_record(model, row, foreign_keys) for row in batch
+        ]
+        if 'password' in columns and hasattr(model, 'set_password'):
+            self._hash_passwords(records)
+        if options['verbosity'] > 2:
+            for record in records:
+                self.stdout.write(
+                    f'Добавляется запись {record} в таблицу '
+                    f'модели {model.__name__}'
+                )
+        self._write_batch(model, records, options, unique_fields)
+
+    def _read_rows(self, file, filename):
+        if filename.endswith('.json'):
+            return self._read_json(file)
+        return self._read_csv(file)
+
+    def _import_data(self, model, filename, options):
+        """
+        Parse data from filename and write records of the model in batches.
+
+        Records which are already in db are skipped or updated if update
+        option is set.
+
+        Returns numbers of records processed and added.
+        """
+        batch_size = options['batch_size']
         try:
-            records_imported_count = 0
-            with open(filename, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    record = self._build_db_record(model, row)
-                    if verbosity > 1:
-                        msg = (
-                            f'Добавляется запись {record} в таблицу '
-                            f'модели {model.__name__}'
+            records_processed_count = 0
+            count_before = model.objects.count()
+            with open(filename, newline='', encoding='utf-8') as file:
+                rows = self._read_rows(file, filename)
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    self._import_batch(model, batch, filename, options)
+                    records_processed_count += len(batch)
+                    if options['verbosity'] > 0:
+                        self.stdout.write(
+                            f'{model.__name__}: обработано записей '
+                            f'{records_processed_count}',
+                            ending='\r' if self.stdout.isatty() else '\n',
                         )
-                        self.stdout.write(self.style.SUCCESS(msg))
-                    try:
-                        if record.get('id'):
-                            model.objects.get(pk=record.get('id'))
-                        else:
-                            model.objects.get(**record)
-                    except model.DoesNotExist:
-                        model.objects.create(**record)
-                    records_imported_count += 1
-            return records_imported_count
+            if options['verbosity'] > 0 and self.stdout.isatty():
+                self.stdout.write('')
+            added = model.objects.count() - count_before
+            return records_processed_count, added
         except FileNotFoundError:
             error_message = (
                 f'Файл {filename} с тестовыми данными не был найден '
                 f'для модели {model.__name__}.'
             )
             raise ImportDataExceptionError(error_message)
-        except csv.Error as err:
+        except (csv.Error, json.JSONDecodeError) as err:
             error_message = (
                 f'Ошибка при парсинге файла {filename} с тестовыми данными '
                 f'для модели {model.__name__}. Причина: {err}'
             )
             raise ImportDataExceptionError(error_message) from err
-        except DatabaseError as err:
+        except (DatabaseError, TypeError, ValidationError) as err:
             error_message = (
                 f'Ошибка при создание записи в таблице модели {model.__name__}'
                 f' на основе тестовых данных из {filename}. '
@@ -111,10 +439,13 @@ class ImportDataBaseCommand(BaseCommand):
         """Display summary."""
         border = '=' * 60
         self.stdout.write(self.style.SUCCESS(border))
-        self.stdout.write(self.style.SUCCESS('ЗАПИСЕЙ ДОБАВЛЕНО\n'))
-        for model_name, recs_count in summary_data.items():
+        header = f'{"":<15}  {"ОБРАБОТАНО":>10}  {"ДОБАВЛЕНО":>10}\n'
+        self.stdout.write(self.style.SUCCESS(header))
+        for model_name, (processed, added) in summary_data.items():
             self.stdout.write(
-                self.style.SUCCESS(f'{model_name:<15}: {recs_count:>3}')
+                self.style.SUCCESS(
+                    f'{model_name:<15}: {processed:>10}  {added:>10}'
+                )
             )
         self.stdout.write(self.style.SUCCESS(border))
 
@@ -122,9 +453,11 @@ class ImportDataBaseCommand(BaseCommand):
         """
         Execute main logic of importdata command.
 
-        It runs through models, builds filename with csv data by modelname,
-        parses csv data, determines fields and its type, build data record
-        and uses it to get or create record in the model table.
+        It runs through models, finds file with data by model name, reads
+        it in batches, checks that referenced records exist and writes each
+        batch with a single bulk insert (COPY in PostgreSQL). Models are
+        imported after models they reference, independent models are
+        imported concurrently.
 
         Note: it doesn't fail in case records are already in db.
         """
@@ -136,22 +469,95 @@ class ImportDataBaseCommand(BaseCommand):
                 )
             )
             return
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть больше нуля')
+
+        summary_data = {model.__name__: (0, 0) for model in self.models}
+        self._known_ids = defaultdict(set)
+        workers = max(1, options['workers'])
+        self._hashing_workers = workers
+        self._hashing_pool = None
+        if workers > 1 and any(
+            hasattr(model, 'set_password') for model in self.models
+        ):
+            self._hashing_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        if connection.vendor == 'sqlite':
+            # SQLite allows one writer at a time
+            workers = 1
+
+        try:
+            self._import_models(summary_data, options, workers)
+        except ImportDataExceptionError as err:
+            # show at least what were added so far
+            self.display_summary(summary_data)
+            raise CommandError(err) from err
+        finally:
+            if self._hashing_pool is not None:
+                self._hashing_pool.shutdown()
+            # bulk inserts don't send signals which keep caches in sync
+            bump_content_version()
 
-        summary_data = {model.__name__: 0 for model in self.models}
+        self.display_summary(summary_data)
 
-        for model in self.models:
+    def _get_dependencies(self):
+        """Return models each model references with foreign keys."""
+        models = set(self.models)
+        return {
+            model: {
+                field.remote_field.model
+                for field in model._meta.concrete_fields
+                if isinstance(field, ForeignKey)
+                and field.remote_field.model in models
+                and field.remote_field.model is not model
+            }
+            for model in self.models
+        }
 
-            filename = self._get_filename_by_model_name(model.__name__)
+    def _import_model(self, model, options):
+        filename = self._get_filename_by_model_name(
+            model.__name__, options['format']
+        )
+        return self._import_data(model, filename, options)
 
-            try:
-                verbosity = options.get('verbosity', 1)
-                records_imported_count = self._import_data(
-                    model, filename, verbosity
-                )
-                summary_data[model.__name__] = records_imported_count
-            except ImportDataExceptionError as err:
-                # show at least what were added so far
-                self.display_summary(summary_data)
-                raise CommandError(err) from err
+    def _import_model_in_thread(self, model, options):
+        try:
+            return self._import_model(model, options)
+        finally:
+            connection.close()
 
-        self.display_summary(summary_data)
+    def _import_models(self, summary_data, options, workers):
+        """
+        Import models after the models they reference.
+
+        Models which don't depend on each other are imported concurrently
+        by workers threads.
+        """
+        pending = self._get_dependencies()
+        imported, running = set(), {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                ready = [
+                    model
+                    for model, required in pending.items()
+                    if required <= imported
+                ]
+                for model in ready:
+                    del pending[model]
+                    future = executor.submit(
+                        self._import_model_in_thread, model, options
+                    )
+                    running[future] = model
+                if not running:
+                    names = ', '.join(model.__name__ for model in pending)
+                    raise ImportDataExceptionError(
+                        f'Модели ссылаются друг на друга: {names}'
+                    )
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    model = running.pop(future)
+                    summary_data[model.__name__] = future.result()
+                    imported.add(model)
@@ -0,0 +1,112 @@
+import os
+import posixpath
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from recipes.models import RECIPE_IMAGES_DIR, Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove recipe image files no recipe refers to and variants of '
+        'such images'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60 * 60,
+            help='Seconds since last modification of files to be removed, '
+            'so that files of uncommitted recipes are kept (default: 3600)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report files to be removed without removing them',
+        )
+
+    def get_references(self):
+        """Return number of recipes referring to each image file."""
+        return dict(
+            Recipe.objects.order_by()
+            .values('image')
+            .annotate(count=Count('pk'))
+            .values_list('image', 'count')
+            .iterator()
+        )
+
+    def walk(self, directory):
+        """Yield (name within the directory, path) of its files."""
+        root = default_storage.path(directory)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                yield name, path
+
+    def clean(self, directory, references, get_image_name):
+        """
+        Remove expired files of the storage directory whose image isn't
+        referenced. Return number and total size of removed files.
+        """
+        removed = removed_size = 0
+        for name, path in self.walk(directory):
+            if get_image_name(name) in references:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime >= self.expired:
+                continue
+            removed += 1
+            removed_size += stat.st_size
+            if not self.dry_run:
+                os.remove(path)
+        if not self.dry_run:
+            self.remove_empty_directories(directory)
+        return removed, removed_size
+
+    def remove_empty_directories(self, directory):
+        root = default_storage.path(directory)
+        for dirpath, _, _ in os.walk(root, topdown=False):
+            if dirpath == root:
+                continue
+            # fresh directories may be about to receive uploaded files
+            try:
+                if os.path.getmtime(dirpath) < self.expired:
+                    os.rmdir(dirpath)
+            except OSError:
+                pass
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.expired = time.time() - options['min_age']
+        references = self.get_references()
+        shared = sum(1 for count in references.values() if count > 1)
+        self.stdout.write(
+            f'Изображений у рецептов: {len(references)}, '
+            f'из них общих: {shared}'
+        )
+
+        images, images_size = self.clean(
+            RECIPE_IMAGES_DIR,
+            references,
+            lambda name: f'{RECIPE_IMAGES_DIR}/{name}',
+        )
+        # variant files are <image name>/<variant>.<format>
+        variants, variants_size = self.clean(
+            settings.IMAGE_VARIANTS_DIR, references, posixpath.dirname
+        )
+        action = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{action} изображений: {images}, вариантов: {variants}, '
+                f'байт: {images_size + variants_size}'
+            )
+        )
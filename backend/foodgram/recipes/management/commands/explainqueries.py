@@ -0,0 +1,155 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay queries of recipe, subscription and shopping cart '
+        'endpoints, EXPLAIN them and report sequential scans and sorts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Email of user the requests are made by '
+            '(default: user with the most recipes in shopping cart)',
+        )
+        parser.add_argument(
+            '--allow-seqscan',
+            action='store_true',
+            help='Do not disable sequential scans in PostgreSQL planner. '
+            'By default they are disabled, so that sequential scans in '
+            'plans mean there is no index to use even on small tables',
+        )
+        parser.add_argument(
+            '--fail-on-issues',
+            action='store_true',
+            help='Exit with error if any issue is found',
+        )
+
+    def get_user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {email} не найден')
+        user = (
+            User.objects.annotate(cart_size=Count('cart_recipes'))
+            .order_by('-cart_size', 'pk')
+            .first()
+        )
+        if user is None:
+            raise CommandError('В базе нет ни одного пользователя')
+        return user
+
+    def get_urls(self, user):
+        urls = [
+            '/api/recipes/',
+            '/api/recipes/?cursor=',
+            '/api/recipes/?is_favorited=1',
+            '/api/recipes/?is_in_shopping_cart=1',
+            f'/api/recipes/?author={user.pk}',
+            '/api/recipes/?search=суп',
+            '/api/recipes/?ordering=-favorites_count',
+            '/api/recipes/feed/',
+            '/api/users/subscriptions/',
+            '/api/users/subscriptions/?cursor=',
+            '/api/recipes/download_shopping_cart/',
+        ]
+        tags = Tag.objects.values_list('slug', flat=True)[:2]
+        if tags:
+            urls.append(
+                '/api/recipes/?' + '&'.join(f'tags={tag}' for tag in tags)
+            )
+        recipe = Recipe.objects.first()
+        if recipe is not None:
+            urls.append(f'/api/recipes/{recipe.pk}/')
+        return urls
+
+    def explain(self, sql):
+        """Return list of issues found in the query plan."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return self._postgresql_issues(plan[0]['Plan'])
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return self._sqlite_issues(cursor.fetchall())
+        return []
+
+    def _postgresql_issues(self, node):
+        issues = []
+        if node['Node Type'] == 'Seq Scan':
+            issues.append(f'sequential scan of {node["Relation Name"]}')
+        if node['Node Type'] in ('Sort', 'Incremental Sort'):
+            issues.append(f'sort by {", ".join(node["Sort Key"])}')
+        for child in node.get('Plans', ()):
+            issues.extend(self._postgresql_issues(child))
+        return issues
+
+    def _sqlite_issues(self, rows):
+        issues = []
+        for row in rows:
+            detail = row[-1]
+            if detail.startswith('SCAN ') and ' USING ' not in detail:
+                issues.append(f'sequential scan of {detail[5:]}')
+            if detail.startswith('USE TEMP B-TREE'):
+                issues.append(detail.lower())
+        return issues
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        client = APIClient()
+        client.force_authenticate(user)
+        issues_count = 0
+
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=['testserver']
+        ):
+            if (
+                connection.vendor == 'postgresql'
+                and not options['allow_seqscan']
+            ):
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for url in self.get_urls(user):
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url)
+                self.stdout.write(
+                    self.style.MIGRATE_HEADING(
+                        f'{url} [{response.status_code}], '
+                        f'запросов: {len(context.captured_queries)}'
+                    )
+                )
+                for query in context.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    issues = self.explain(sql)
+                    if not issues:
+                        continue
+                    issues_count += len(issues)
+                    self.stdout.write(f'  {sql}')
+                    for issue in issues:
+                        self.stdout.write(self.style.WARNING(f'    {issue}'))
+
+            transaction.set_rollback(True)
+
+        if issues_count and options['fail_on_issues']:
+            raise CommandError(f'Найдено проблем: {issues_count}')
+        style = self.style.WARNING if issues_count else self.style.SUCCESS
+        self.stdout.write(style(f'Найдено проблем: {issues_count}'))
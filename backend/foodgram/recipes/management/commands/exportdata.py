@@ -0,0 +1,92 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.export import (
+    EXPORT_FORMATS,
+    get_export,
+    parse_watermark,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Export recipes with their tags, ingredients and author as NDJSON '
+        'or CSV, all of them or only modified since the previous export'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='ndjson',
+            help='Output format (default: ndjson)',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write recipes to (default: standard output)',
+        )
+        parser.add_argument(
+            '--since',
+            help='Export only recipes modified after the ISO 8601 time',
+        )
+        parser.add_argument(
+            '--watermark-file',
+            help='File keeping modified time of the last exported recipe. '
+            'Unless --since is given, only recipes modified after it are '
+            'exported, and it is updated after successful export',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Number of recipes fetched from the database at once',
+        )
+
+    def get_since(self, options):
+        value = options['since']
+        path = options['watermark_file']
+        if value is None and path and os.path.exists(path):
+            with open(path) as file:
+                value = file.read().strip() or None
+        if value is None:
+            return None
+        try:
+            return parse_watermark(value)
+        except ValueError:
+            raise CommandError(f'Неверный формат времени: {value}')
+
+    def save_watermark(self, path, watermark):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(watermark.isoformat())
+        os.replace(tmp_path, path)
+
+    def count(self, recipes):
+        for recipe in recipes:
+            self.exported += 1
+            yield recipe
+
+    def handle(self, *args, **options):
+        since = self.get_since(options)
+        recipes, watermark = get_export(since, options['chunk_size'])
+
+        generate, _ = EXPORT_FORMATS[options['format']]
+        self.exported = 0
+        output = (
+            open(options['output'], 'w', newline='')
+            if options['output']
+            else sys.stdout
+        )
+        try:
+            for line in generate(self.count(recipes)):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if options['watermark_file'] and watermark is not None:
+            self.save_watermark(options['watermark_file'], watermark)
+        self.stderr.write(
+            self.style.SUCCESS(f'Экспортировано рецептов: {self.exported}')
+        )
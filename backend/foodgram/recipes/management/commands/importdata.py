@@ -1,5 +1,7 @@
+from common.search import update_search_vector
+from common.shopping_cart import bump_shopping_cart_version
 from recipes.management.base import ImportDataBaseCommand
-from recipes.models import Ingredient, Tag
+from recipes.models import Ingredient, Recipe, Tag
 from users.models import User
 
 
@@ -9,3 +11,10 @@ class Command(ImportDataBaseCommand):
         Tag,
         User,
     )
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        if options['update']:
+            # updated ingredients change search vectors and shopping lists
+            update_search_vector(Recipe.objects.values('pk'))
+            bump_shopping_cart_version()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from common.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recalculate denormalized counters of recipes and users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drifted counters without fixing them',
+        )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_counters(dry_run=options['dry_run'])
+        for counter, count in drifted.items():
+            style = self.style.WARNING if count else self.style.SUCCESS
+            self.stdout.write(style(f'{counter:<25}: {count:>5}'))
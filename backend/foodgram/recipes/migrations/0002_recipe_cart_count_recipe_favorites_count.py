@@ -0,0 +1,58 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ("recipes", "FavoriteRecipe", "recipes", "Recipe", "recipe", "favorites_count"),
+    ("recipes", "InCartRecipe", "recipes", "Recipe", "recipe", "cart_count"),
+    ("recipes", "Recipe", "users", "User", "author", "recipes_count"),
+    ("users", "Subscribe", "users", "User", "author", "subscribers_count"),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for source_app, source, app, model, source_field, field in COUNTERS:
+        source_model = apps.get_model(source_app, source)
+        counter_model = apps.get_model(app, model)
+        counter_model.objects.update(
+            **{
+                field: Coalesce(
+                    Subquery(
+                        source_model.objects.filter(**{source_field: OuterRef("pk")})
+                        .order_by()
+                        .values(source_field)
+                        .annotate(total=Count("pk"))
+                        .values("total")
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_recipes_count_user_subscribers_count"),
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="cart_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="cart count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="favorites count"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
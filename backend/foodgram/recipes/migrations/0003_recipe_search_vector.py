@@ -0,0 +1,59 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=["search_vector"], name="recipe_search_vector"
+)
+
+
+def create_index(apps, schema_editor):
+    # GIN indexes exist only in PostgreSQL, other databases search
+    # without the search vector
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("recipes", "Recipe"), INDEX)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("recipes", "Recipe"), INDEX)
+
+
+def fill_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from common.search import build_search_vector
+
+    Recipe = apps.get_model("recipes", "Recipe")
+    IngredientRecipe = apps.get_model("recipes", "IngredientRecipe")
+    Recipe.objects.update(
+        search_vector=build_search_vector(IngredientRecipe)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0002_recipe_cart_count_recipe_favorites_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="search vector"
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="recipe", index=INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_index, drop_index),
+            ],
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipe_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tagrecipe",
+            index=models.Index(fields=["recipe", "tag"], name="tag_recipe_recipe_tag"),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_tagrecipe_recipe_tag_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="favoriterecipe",
+            index=models.Index(
+                fields=["user", "-created"], name="favorite_user_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="favoriterecipe",
+            index=models.Index(fields=["user", "recipe"], name="favorite_user_recipe"),
+        ),
+        migrations.AddIndex(
+            model_name="incartrecipe",
+            index=models.Index(
+                fields=["user", "-created"], name="in_cart_user_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="incartrecipe",
+            index=models.Index(fields=["user", "recipe"], name="in_cart_user_recipe"),
+        ),
+        migrations.AddIndex(
+            model_name="ingredientrecipe",
+            index=models.Index(
+                fields=["recipe", "ingredient"], name="ingredient_recipe_recipe"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-created", "name", "id"], name="recipe_ordering"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-created"], name="recipe_author_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["modified"], name="recipe_modified"),
+        ),
+        migrations.AddIndex(
+            model_name="tagrecipe",
+            index=models.Index(fields=["tag", "recipe"], name="tag_recipe_tag_recipe"),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:35
+
+import common.storage
+from django.db import migrations, models
+import recipes.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_recipe_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                storage=common.storage.HashedFileSystemStorage(),
+                upload_to=recipes.models.user_directory_path,
+                verbose_name="image",
+            ),
+        ),
+    ]
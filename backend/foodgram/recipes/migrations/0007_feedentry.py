@@ -0,0 +1,94 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_feeds(apps, schema_editor):
+    Subscribe = apps.get_model("users", "Subscribe")
+    Recipe = apps.get_model("recipes", "Recipe")
+    FeedEntry = apps.get_model("recipes", "FeedEntry")
+    user_ids = list(
+        Subscribe.objects.order_by().values_list("user_id", flat=True).distinct()
+    )
+    for user_id in user_ids:
+        recipes = (
+            Recipe.objects.filter(
+                author__in=Subscribe.objects.filter(user_id=user_id).values("author_id")
+            )
+            .order_by("-created", "-pk")
+            .values_list("pk", "created")[: settings.FEED_MAX_ENTRIES]
+        )
+        FeedEntry.objects.bulk_create(
+            FeedEntry(user_id=user_id, recipe_id=recipe_id, created=created)
+            for recipe_id, created in recipes
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0006_recipe_image_storage"),
+        ("users", "0002_user_recipes_count_user_subscribers_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        help_text="Creation time of the recipe", verbose_name="created"
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to="recipes.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "feed entry",
+                "verbose_name_plural": "feed entries",
+                "ordering": ("-created", "-recipe"),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="feedentry",
+            index=models.Index(
+                fields=["user", "-created", "-recipe"], name="feed_user_created"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="feedentry",
+            constraint=models.UniqueConstraint(
+                fields=("user", "recipe"), name="unique_feed_entry"
+            ),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
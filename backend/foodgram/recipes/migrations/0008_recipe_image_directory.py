@@ -0,0 +1,23 @@
+# Generated by Django 4.1.1 on 2026-10-18 19:12
+
+import common.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_feedentry"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                storage=common.storage.HashedFileSystemStorage(),
+                upload_to="recipes/images",
+                verbose_name="image",
+            ),
+        ),
+    ]
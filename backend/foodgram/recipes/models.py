@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from common.mixins import TimeStampedMixin
+from common.storage import HashedFileSystemStorage
 
 User = get_user_model()
 
@@ -39,14 +42,22 @@ class Ingredient(TimeStampedMixin):
         ]
 
 
+RECIPE_IMAGES_DIR = 'recipes/images'
+
+
+# images were stored in directories of authors, kept for migrations
 def user_directory_path(instance, filename):
-    return f'recipes/images/user_{instance.author.id}/{filename}'
+    return f'{RECIPE_IMAGES_DIR}/user_{instance.author.id}/{filename}'
 
 
 class Recipe(TimeStampedMixin):
     name = models.CharField(_('name'), max_length=200)
     text = models.TextField(_('text'))
-    image = models.ImageField(_('image'), upload_to=user_directory_path)
+    image = models.ImageField(
+        _('image'),
+        upload_to=RECIPE_IMAGES_DIR,
+        storage=HashedFileSystemStorage(),
+    )
     cooking_time = models.PositiveSmallIntegerField(
         _('cooking time'), validators=[MinValueValidator(1)]
     )
@@ -61,6 +72,15 @@ class Recipe(TimeStampedMixin):
         Ingredient,
         through='IngredientRecipe',
     )
+    favorites_count = models.PositiveIntegerField(
+        _('favorites count'), default=0, editable=False
+    )
+    cart_count = models.PositiveIntegerField(
+        _('cart count'), default=0, editable=False
+    )
+    search_vector = SearchVectorField(
+        _('search vector'), null=True, editable=False
+    )
 
     class Meta:
         ordering = ('-created', 'name')
@@ -71,6 +91,16 @@ class Recipe(TimeStampedMixin):
                 fields=['name', 'author'], name='unique_recipe'
             )
         ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='recipe_search_vector'),
+            models.Index(
+                fields=['-created', 'name', 'id'], name='recipe_ordering'
+            ),
+            models.Index(
+                fields=['author', '-created'], name='recipe_author_created'
+            ),
+            models.Index(fields=['modified'], name='recipe_modified'),
+        ]
 
 
 class TagRecipe(models.Model):
@@ -82,6 +112,14 @@ class TagRecipe(models.Model):
         ordering = ('-created',)
         verbose_name = _("recipe\'s tag")
         verbose_name_plural = _("recipe\'s tags")
+        indexes = [
+            models.Index(
+                fields=['recipe', 'tag'], name='tag_recipe_recipe_tag'
+            ),
+            models.Index(
+                fields=['tag', 'recipe'], name='tag_recipe_tag_recipe'
+            ),
+        ]
 
 
 class IngredientRecipe(models.Model):
@@ -107,6 +145,12 @@ class IngredientRecipe(models.Model):
         ordering = ('-created',)
         verbose_name = _("recipe\'s ingredient")
         verbose_name_plural = _("recipe\'s ingredients")
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient'],
+                name='ingredient_recipe_recipe',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['ingredient', 'recipe', 'amount'],
@@ -134,6 +178,14 @@ class FavoriteRecipe(models.Model):
         ordering = ('-created',)
         verbose_name = _('favorite recipe')
         verbose_name_plural = _('favorite recipes')
+        indexes = [
+            models.Index(
+                fields=['user', '-created'], name='favorite_user_created'
+            ),
+            models.Index(
+                fields=['user', 'recipe'], name='favorite_user_recipe'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['recipe', 'user'],
@@ -160,9 +212,59 @@ class InCartRecipe(models.Model):
         ordering = ('-created',)
         verbose_name = _('recipe in cart')
         verbose_name_plural = _('recipes in cart')
+        indexes = [
+            models.Index(
+                fields=['user', '-created'], name='in_cart_user_created'
+            ),
+            models.Index(
+                fields=['user', 'recipe'], name='in_cart_user_recipe'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['recipe', 'user'],
                 name='unique_recipe_in_cart',
             )
         ]
+
+
+class FeedEntry(models.Model):
+    """
+    Recipe in the feed of a user subscribed to its author.
+
+    Entries are written when recipes are created and subscriptions change,
+    so reading the feed doesn't join subscriptions to recipes.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name=_('user'),
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name=_('recipe'),
+    )
+    created = models.DateTimeField(
+        _('created'), help_text=_('Creation time of the recipe')
+    )
+
+    class Meta:
+        ordering = ('-created', '-recipe')
+        verbose_name = _('feed entry')
+        verbose_name_plural = _('feed entries')
+        indexes = [
+            models.Index(
+                fields=['user', '-created', '-recipe'],
+                name='feed_user_created',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry',
+            )
+        ]
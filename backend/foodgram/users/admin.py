@@ -25,6 +25,8 @@ class CustomUserAdmin(UserAdmin):
         'email',
         'first_name',
         'last_name',
+        'recipes_count',
+        'subscribers_count',
         'is_staff',
     )
     list_filter = (
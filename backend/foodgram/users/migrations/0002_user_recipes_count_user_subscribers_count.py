@@ -0,0 +1,27 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="recipes count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="subscribers_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="subscribers count"
+            ),
+        ),
+    ]
@@ -16,6 +16,12 @@ class User(AbstractUser):
     first_name = models.CharField(_('first name'), max_length=150)
     last_name = models.CharField(_('last name'), max_length=150)
     email = models.EmailField(_('email address'), unique=True, max_length=150)
+    recipes_count = models.PositiveIntegerField(
+        _('recipes count'), default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        _('subscribers count'), default=0, editable=False
+    )
 
 
 class Subscribe(models.Model):
@@ -20,6 +20,8 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         return (
             not user.is_anonymous
@@ -29,7 +31,7 @@ class CustomUserSerializer(UserSerializer):
 
 class SubscribeSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
     recipes = SimpleRecipeSerializer(many=True)
 
     class Meta:
@@ -53,8 +55,5 @@ class SubscribeSerializer(UserSerializer):
             'recipes',
         )
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
     def get_is_subscribed(self, obj):
         return True
@@ -1,10 +1,15 @@
+from django.conf import settings as django_settings
+from django.db.models import F, Prefetch, prefetch_related_objects
 from djoser.conf import settings
 from djoser.views import UserViewSet
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from common.paginators import DynamicLimitPaginator
-from common.utils import follow, unfollow
+from common.paginators import (
+    DynamicLimitPaginator,
+    KeysetDynamicLimitPaginator,
+)
+from common.utils import follow, get_latest_recipes, unfollow
 from users.models import Subscribe, User
 from users.serializers import CustomUserSerializer, SubscribeSerializer
 
@@ -23,15 +28,47 @@ class CustomUserViewSet(UserViewSet):
 
         return super().get_permissions()
 
+    def get_recipes_limit(self):
+        """
+        Return number of recipes of each author from recipes_limit query
+        parameter, not greater than SUBSCRIPTION_RECIPES_LIMIT.
+        """
+        max_limit = django_settings.SUBSCRIPTION_RECIPES_LIMIT
+        try:
+            limit = int(self.request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            return max_limit
+        return min(limit, max_limit) if limit > 0 else max_limit
+
+    def prefetch_recipes(self, authors):
+        """Prefetch only recipes of the authors to be serialized."""
+        recipes = get_latest_recipes(
+            [author.pk for author in authors], self.get_recipes_limit()
+        ).only('id', 'name', 'image', 'cooking_time', 'author_id')
+        prefetch_related_objects(
+            authors, Prefetch('recipes', queryset=recipes)
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('subscriptions', 'subscribe') and args:
+            instance = args[0]
+            self.prefetch_recipes(
+                instance if kwargs.get('many') else [instance]
+            )
+        return super().get_serializer(*args, **kwargs)
+
     @action(
         detail=False,
         url_path='subscriptions',
         serializer_class=SubscribeSerializer,
+        pagination_class=KeysetDynamicLimitPaginator,
     )
     def subscriptions(self, request):
-        user = request.user
-        subscriptions = user.subscriptions.all()
-        authors = [subscription.author for subscription in subscriptions]
+        authors = (
+            User.objects.filter(subscribers__user=request.user)
+            .annotate(subscription_id=F('subscribers__id'))
+            .order_by('subscription_id')
+        )
         page = self.paginate_queryset(authors)
         if page is not None:
             serializer = self.get_serializer(page, many=True)